@@ -0,0 +1,73 @@
+"""Compares the legacy per-call sqlite path with the pooled, batched MusicCache.
+
+Usage: python -m benchmarks.cache_bench [--rows 10000 100000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from core.db import CacheEntry, MusicCache
+from core.track import Track
+
+
+class LegacyCache:
+    """Replica of the original MusicCache: one connection and one commit per call."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS track_mapping '
+                         '(yandex_key TEXT PRIMARY KEY, youtube_id TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+
+    def get_youtube_id(self, track):
+        key = f"{track.artist} - {track.name}".lower()
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('SELECT youtube_id FROM track_mapping WHERE yandex_key = ?', (key,)).fetchone()
+            return row[0] if row else None
+
+    def save_mapping(self, track, youtube_id):
+        key = f"{track.artist} - {track.name}".lower()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('INSERT OR REPLACE INTO track_mapping (yandex_key, youtube_id) VALUES (?, ?)',
+                         (key, youtube_id))
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(rows: int) -> dict:
+    tracks = [Track(f"Artist {i}", f"Song {i}", 200000) for i in range(rows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyCache(os.path.join(tmp, 'legacy.db'))
+        legacy_write = _timed(lambda: [legacy.save_mapping(t, f"v{i}") for i, t in enumerate(tracks)])
+        legacy_read = _timed(lambda: [legacy.get_youtube_id(t) for t in tracks])
+
+        cache = MusicCache(os.path.join(tmp, 'pooled.db'))
+        pooled_write = _timed(lambda: (cache.save_many((t, CacheEntry(f"v{i}")) for i, t in enumerate(tracks)), cache.flush()))
+        pooled_read = _timed(lambda: cache.get_many(tracks))
+        cache.close()
+
+    return {
+        'rows': rows,
+        'legacy_write_s': round(legacy_write, 3), 'legacy_read_s': round(legacy_read, 3),
+        'pooled_write_s': round(pooled_write, 3), 'pooled_read_s': round(pooled_read, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        r = run(rows)
+        print(f"{r['rows']:>7} rows | write: legacy {r['legacy_write_s']:.2f}s vs pooled {r['pooled_write_s']:.2f}s"
+              f" | read: legacy {r['legacy_read_s']:.2f}s vs pooled {r['pooled_read_s']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""End-to-end transfer benchmark against simulated Yandex and YouTube Music backends.
+
+Usage: python -m benchmarks.transfer_bench [--tracks 1000 10000] [--latency 0.01] [--out results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from core.db import MusicCache
+from core.fakes import FakeYandexClient, FakeYTMusic, SimulatedNetwork, synthetic_library
+from core.metrics import METRICS
+from core.pipeline import TransferPipeline
+from core.transport import PooledSession
+from core.yandex import YandexMusicExporter
+from core.youtube import YoutubeImporter
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _transfer(library, yt_net, ya_net, cache, playlist_id, fake_yt, args):
+    client = FakeYandexClient(library, network=ya_net)
+    exporter = YandexMusicExporter('', client=client, metadata_cache=cache)
+    importer = YoutubeImporter(workers=args.workers, rate_limit=args.rate_limit, cache=cache,
+                               insert_delay=0.0, ytmusic=fake_yt)
+    track_ids = exporter.liked_track_ids()
+    track_ids.reverse()
+    METRICS.reset()
+    start = time.perf_counter()
+    stats = TransferPipeline(importer).run(exporter.iter_tracks(track_ids), playlist_id, total=len(track_ids))
+    return stats, time.perf_counter() - start
+
+
+def run_scenario(size: int, args) -> dict:
+    """Runs a cold and a warm transfer of a synthetic library; meant to run in a fresh process."""
+    library = synthetic_library(size, seed=args.seed)
+    yt_net = SimulatedNetwork(args.latency, args.jitter, args.error_rate, args.max_rps, seed=args.seed)
+    ya_net = SimulatedNetwork(args.latency, args.jitter, 0.0, 0.0, seed=args.seed)
+    # Injected 429/503s go through the same retries as real ytmusicapi calls instead of failing searches outright
+    fake_yt = FakeYTMusic(library, network=yt_net, session=PooledSession(pool_size=args.workers + 8))
+    playlist_id = fake_yt.create_playlist('Benchmark', '')
+
+    result = {'tracks': size}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = MusicCache(os.path.join(tmp, 'music_cache.db'))
+        for phase in ('cold', 'warm'):
+            calls_before = yt_net.total_calls + ya_net.total_calls
+            hits, misses = cache.hits, cache.misses
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats, elapsed = _transfer(library, yt_net, ya_net, cache, playlist_id, fake_yt, args)
+            lookups = (cache.hits - hits) + (cache.misses - misses)
+            errors, throttled = METRICS.counters.get('search.errors', 0), METRICS.counters.get('search.throttled', 0)
+            # Searches that gave up are reported as not_found by the pipeline but resolved nothing
+            resolved = stats['added'] + stats['skipped'] + stats['not_found'] - errors - throttled
+            result[phase] = {
+                'seconds': round(elapsed, 3),
+                'tracks_per_sec': round(resolved / elapsed, 1) if elapsed else None,
+                'resolved': resolved,
+                'search_errors': errors,
+                'search_throttled': throttled,
+                'api_calls_per_track': round((yt_net.total_calls + ya_net.total_calls - calls_before) / size, 3),
+                'cache_hit_rate': round((cache.hits - hits) / lookups, 3) if lookups else 0.0,
+                # Seconds from the start of the transfer until the first search returned (None when fully cached)
+                'time_to_first_search_s': METRICS.milestones.get('first_search'),
+                'stats': stats,
+            }
+        cache.close()
+
+    result['calls'] = {'youtube': dict(yt_net.calls), 'yandex': dict(ya_net.calls)}
+    result['throttled'] = yt_net.throttled
+    result['injected_errors'] = yt_net.errors
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, nargs='+', default=[1000, 10_000])
+    parser.add_argument('--latency', type=float, default=0.01, help='base seconds per simulated API call')
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-rps', type=float, default=0.0, help='server-side throttle, 0 = unlimited')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='client-side token bucket, 0 = off')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.tracks:
+        # A fresh process per size keeps peak RSS figures independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            r = pool.submit(run_scenario, size, args).result()
+        results.append(r)
+        for phase in ('cold', 'warm'):
+            p = r[phase]
+            first = p['time_to_first_search_s']
+            print(f"{size:>7} tracks {phase:>4} | {p['tracks_per_sec']:>8} tracks/s | "
+                  f"{p['api_calls_per_track']:.2f} calls/track | hit rate {p['cache_hit_rate']:.0%} | "
+                  f"first search {'-' if first is None else f'{first:.2f}s'} | "
+                  f"resolved {p['resolved']}, failed searches {p['search_errors']} + {p['search_throttled']} throttled")
+        print(f"{'':>7}        peak RSS {r['peak_rss_mb']} MB | throttled {r['throttled']}")
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"💾 Results saved to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,14 @@
 from .track import Track
-from .yandex import YandexMusicExporter
-from .youtube import YoutubeImporter
\ No newline at end of file
+
+# Exporter/importer pull in the API client libraries; load them on first access
+_LAZY = {
+    'YandexMusicExporter': '.yandex',
+    'YoutubeImporter': '.youtube',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        return getattr(import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,82 @@
+"""Portable match-cache files: JSON lines behind a versioned header, gzip-compressed for *.gz paths."""
+import gzip
+import json
+import os
+import time
+from typing import Dict, Iterator, Optional
+from .db import MusicCache, Row
+from .matching import SCORER_VERSION
+
+FORMAT = 'y2y-match-cache'
+FORMAT_VERSION = 1
+# Shipped next to the app; merged into an empty music_cache.db on first start
+SEED_FILE = 'music_cache.seed.jsonl.gz'
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    return open(path, mode, encoding='utf-8')
+
+
+def export_cache(cache: MusicCache, path: str, include_misses: bool = True,
+                 include_candidates: bool = True) -> int:
+    """Writes the cache's mappings to path atomically and returns the number of rows written."""
+    tmp = f"{path}.tmp{'.gz' if path.endswith('.gz') else ''}"
+    count = 0
+    with _open(tmp, 'w') as f:
+        header = {'format': FORMAT, 'version': FORMAT_VERSION, 'scorer': SCORER_VERSION, 'created': int(time.time()),
+                  'misses': include_misses, 'candidates': include_candidates}
+        f.write(json.dumps(header) + '\n')
+        for key, youtube_id, score, query, candidates, ts in cache.iter_rows(include_misses, include_candidates):
+            # Candidates are embedded as JSON rather than as an escaped string
+            row = [key, youtube_id, score, query, json.loads(candidates) if candidates else None, ts]
+            f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def read_header(path: str) -> dict:
+    with _open(path, 'r') as f:
+        return _check_header(f.readline())
+
+
+def _check_header(line: str) -> dict:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ValueError("Not a match cache file")
+    if header.get('version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Cache file version {header['version']} is newer than supported ({FORMAT_VERSION})")
+    return header
+
+
+def read_rows(path: str) -> Iterator[Row]:
+    """Streams rows from a cache file after validating its header."""
+    with _open(path, 'r') as f:
+        _check_header(f.readline())
+        for number, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            try:
+                key, youtube_id, score, query, candidates, ts = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: malformed row ({e})") from e
+            yield key, youtube_id, score, query, json.dumps(candidates) if candidates else None, ts
+
+
+def import_cache(cache: MusicCache, path: str, on_conflict: str = 'best') -> Dict[str, int]:
+    """Merges a cache file into the cache using one of db.CONFLICT_RULES."""
+    return cache.merge_rows(read_rows(path), on_conflict=on_conflict)
+
+
+def seed_if_empty(cache: MusicCache, path: str = SEED_FILE) -> Optional[Dict[str, int]]:
+    """Pre-warms a fresh cache from a shipped seed file; does nothing if either is missing or the cache has data."""
+    if not os.path.exists(path) or not cache.is_empty:
+        return None
+    result = import_cache(cache, path)
+    print(f"🌱 Cache seeded with {result['inserted']} mappings from {path}")
+    return result
@@ -0,0 +1,325 @@
+"""Headless entry point: python -m core sync --playlist <id> [options] | jobs <file> | cache export|import <file>"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+CONFIG_FILE = 'settings.json'
+YT_HEADERS_FILE = 'headers.json'
+RUN_REPORT_FILE = 'run_report.json'
+
+
+class JsonLinesOutput:
+    """Turns prints and progress updates into one JSON object per line for log collectors."""
+
+    def __init__(self, stream, min_interval: float = 1.0):
+        self.stream = stream
+        self.min_interval = min_interval
+        self._last_progress = 0.0
+
+    def emit(self, event: str, **fields):
+        fields = {'event': event, 'ts': round(time.time(), 3), **fields}
+        self.stream.write(json.dumps(fields, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def write(self, text):
+        if text.strip():
+            self.emit('log', message=text.strip())
+
+    def flush(self):
+        self.stream.flush()
+
+    def progress(self, current: int, total: int):
+        # Coalesce per-track callbacks into at most one event per interval (plus the final one)
+        now = time.monotonic()
+        if current < total and now - self._last_progress < self.min_interval:
+            return
+        self._last_progress = now
+        self.emit('progress', current=current, total=total)
+
+
+class TextProgress:
+    """Single-line progress indicator for interactive terminals."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._last = -1
+
+    def __call__(self, current: int, total: int):
+        percent = int(current * 100 / total) if total else 100
+        if percent != self._last:
+            self._last = percent
+            self.stream.write(f"\r⏳ {current}/{total} ({percent}%)")
+            if current >= total:
+                self.stream.write('\n')
+            self.stream.flush()
+
+
+def _read_token(args) -> str:
+    token = args.token or os.environ.get('YANDEX_TOKEN')
+    if token:
+        return token
+    with open(args.settings, 'r', encoding='utf-8') as f:
+        return json.load(f)['yandex_token']
+
+
+def cmd_sync(args) -> int:
+    out = JsonLinesOutput(sys.__stdout__) if args.json else None
+    if out:
+        sys.stdout = out
+    try:
+        # Checked before any client authenticates or a database is opened
+        if args.source == 'likes' and not args.playlist and not args.new_playlist:
+            raise ValueError("--playlist or --new-playlist is required for --source likes")
+        return _sync(args, out)
+    except (Exception, KeyboardInterrupt) as e:
+        if not out:
+            raise
+        # main() would print plain text after stdout is restored, breaking the JSON stream
+        interrupted = isinstance(e, KeyboardInterrupt)
+        out.emit('error', message='Interrupted; rerun to resume from the last checkpoint.' if interrupted else str(e),
+                 type=type(e).__name__)
+        return 130 if interrupted else 2
+    finally:
+        if out:
+            sys.stdout = sys.__stdout__
+
+
+def _sync(args, out: Optional[JsonLinesOutput]) -> int:
+    from .yandex import YandexMusicExporter
+    from .youtube import YoutubeImporter
+    from .journal import TransferJournal
+    from .state import SyncState
+    from .pipeline import run_liked_transfer
+    from .resolver import DEFAULT_TIERS, parse_tiers
+    from .cache_file import seed_if_empty
+    from .transport import shared_session
+    from .metrics import METRICS
+
+    METRICS.reset()
+    if args.profile:
+        METRICS.enable_profiling(args.profile)
+    progress = out.progress if out else TextProgress(sys.stderr)
+
+    started = time.monotonic()
+    tiers = parse_tiers(args.tiers) if args.tiers else DEFAULT_TIERS
+    # One keep-alive pool for both APIs, sized so no search or export worker waits for a connection
+    shared_session(pool_size=args.pool_size or max(16, args.workers + args.yandex_parallel + 4),
+                   max_retries=args.http_retries)
+    # Both clients authenticate over the network; build them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yt_future = pool.submit(YoutubeImporter, auth_file=args.headers, workers=args.workers,
+                                rate_limit=args.rate_limit, match_threshold=args.threshold, tiers=tiers)
+        yandex = pool.submit(YandexMusicExporter, _read_token(args), parallel=args.yandex_parallel).result()
+        yt = yt_future.result()
+    yandex.metadata_cache = yt.cache
+    METRICS.mark('startup.clients_ready')
+    seed_if_empty(yt.cache)
+
+    if args.source == 'all':
+        return _sync_library(args, out, yt, yandex, progress, started)
+
+    playlist_id = args.playlist
+    if args.new_playlist:
+        if args.dry_run:
+            print(f"🧪 Dry run: playlist '{args.new_playlist}' would be created")
+            playlist_id = None
+        else:
+            playlist_id = yt.ytmusic.create_playlist(args.new_playlist, "Automated Import")
+            print(f"🆕 Created playlist {playlist_id}")
+
+    journal = None if args.dry_run or args.no_journal else TransferJournal()
+    state = SyncState()
+    try:
+        with METRICS.phase('run_sync'):
+            stats = run_liked_transfer(yandex, yt, playlist_id, journal=journal, resume=not args.no_resume,
+                                       state=state, incremental=args.incremental, dry_run=args.dry_run,
+                                       progress_callback=progress)
+    finally:
+        if journal:
+            journal.close()
+        state.close()
+        yt.cache.close()
+
+    if stats is None:
+        print("📭 No tracks found in the source.")
+        stats = {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+    elapsed = round(time.monotonic() - started, 2)
+    tiers = _report_tiers(yt, out)
+    if args.report:
+        METRICS.write_json(args.report, extra={'stats': stats, 'playlist_id': playlist_id, 'search_tiers': tiers})
+    if args.prometheus:
+        METRICS.write_prometheus(args.prometheus)
+    if out:
+        out.emit('done', playlist_id=playlist_id, dry_run=args.dry_run, seconds=elapsed, stats=stats)
+    else:
+        verb = "Would add" if args.dry_run else "Added"
+        print(f"✨ {verb}: {stats['added']} | Skipped: {stats['skipped']} | "
+              f"Not found: {stats['not_found']} | Failed: {stats['failed']} | {elapsed}s")
+        _print_startup()
+    return 1 if stats['failed'] else 0
+
+
+def _sync_library(args, out, yt, yandex, progress, started) -> int:
+    from .library import run_library_transfer
+    from .metrics import METRICS
+    from .state import SyncState
+
+    state = SyncState()
+    try:
+        with METRICS.phase('run_sync'):
+            result = run_library_transfer(yandex, yt, state, dry_run=args.dry_run, progress_callback=progress)
+    finally:
+        state.close()
+        yt.cache.close()
+
+    elapsed = round(time.monotonic() - started, 2)
+    result['search_tiers'] = _report_tiers(yt, out)
+    if args.report:
+        METRICS.write_json(args.report, extra=result)
+    if args.prometheus:
+        METRICS.write_prometheus(args.prometheus)
+    stats = result['stats']
+    if out:
+        out.emit('done', dry_run=args.dry_run, seconds=elapsed, **result)
+    else:
+        print(f"✨ {len(result['collections'])} collections | {result['unique_tracks']} unique of "
+              f"{result['entries']} entries | {result['searches']} searches | Added: {stats['added']} | "
+              f"Skipped: {stats['skipped']} | Not found: {stats['not_found']} | Failed: {stats['failed']} | {elapsed}s")
+        _print_startup()
+    return 1 if stats['failed'] else 0
+
+
+def _print_startup():
+    from .metrics import METRICS
+
+    marks = METRICS.milestones
+    if 'startup.clients_ready' in marks:
+        first = marks.get('first_search')
+        print(f"⏱️ Clients ready in {marks['startup.clients_ready']:.2f}s"
+              + (f", first search at {first:.2f}s" if first is not None else ""))
+
+
+def _report_tiers(yt, out: Optional[JsonLinesOutput]) -> dict:
+    """Prints API calls and early exits per search tier; returns them for the run report."""
+    tiers = yt.resolver.report()
+    if out:
+        out.emit('search_tiers', tiers=tiers)
+    elif any(t['calls'] for t in tiers.values()):
+        print("🔎 Search tiers: " + " | ".join(f"{name}: {t['calls']} calls, {t['exits']} early exits"
+                                              for name, t in tiers.items()))
+    return tiers
+
+
+def cmd_jobs(args) -> int:
+    from .db import MusicCache
+    from .cache_file import seed_if_empty
+    from .jobs import JobRunner, load_jobs
+    from .journal import TransferJournal
+    from .state import SyncState
+
+    jobs = load_jobs(args.jobs_file)
+    cache, journal, state = MusicCache(), TransferJournal(), SyncState()
+    seed_if_empty(cache)
+    try:
+        report = JobRunner(jobs, cache=cache, max_parallel=args.parallel, journal=journal, state=state,
+                           incremental=args.incremental).run()
+    finally:
+        cache.close()
+        journal.close()
+        state.close()
+
+    print(f"📊 {report['tracks']} tracks in {report['seconds']}s ({report['tracks_per_sec']} tracks/s) | "
+          f"cache hit rate {report['cache_hit_rate']:.0%} | cross-account {report['cross_account_hit_rate']:.0%}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"💾 Report saved to {args.report}")
+    return 1 if report['failed_jobs'] else 0
+
+
+def cmd_cache(args) -> int:
+    from .db import MusicCache
+    from .cache_file import export_cache, import_cache, read_header
+
+    started = time.monotonic()
+    with MusicCache(args.db) as cache:
+        if args.action == 'export':
+            count = export_cache(cache, args.file, include_misses=not args.no_misses,
+                                 include_candidates=not args.no_candidates)
+            print(f"📦 Exported {count} mappings to {args.file} ({os.path.getsize(args.file) / 1e6:.1f} MB, "
+                  f"{time.monotonic() - started:.1f}s)")
+        else:
+            header = read_header(args.file)
+            result = import_cache(cache, args.file, on_conflict=args.on_conflict)
+            print(f"📥 {result['rows']} rows from {args.file} (v{header['version']}): {result['inserted']} new, "
+                  f"{result['updated']} updated, {result['unchanged']} kept ({time.monotonic() - started:.1f}s)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m core', description='Yandex Music -> YouTube Music transfer')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sync = sub.add_parser('sync', help='transfer liked tracks into a YouTube Music playlist')
+    target = sync.add_mutually_exclusive_group()
+    target.add_argument('--playlist', help='target playlist ID ("LM" for Liked Music)')
+    target.add_argument('--new-playlist', metavar='TITLE', help='create a new playlist with this title')
+    sync.add_argument('--source', choices=['likes', 'all'], default='likes',
+                      help="'all' mirrors likes, playlists and liked albums into one YouTube playlist each")
+    sync.add_argument('--token', help=f'Yandex token (default: $YANDEX_TOKEN or {CONFIG_FILE})')
+    sync.add_argument('--settings', default=CONFIG_FILE)
+    sync.add_argument('--headers', default=YT_HEADERS_FILE, help='YouTube Music headers.json')
+    sync.add_argument('--workers', type=int, default=4, help='concurrent searches')
+    sync.add_argument('--yandex-parallel', type=int, default=4, help='concurrent Yandex metadata requests')
+    sync.add_argument('--rate-limit', type=float, default=5.0, help='max searches per second, 0 = unlimited')
+    sync.add_argument('--pool-size', type=int, help='keep-alive connections per host (default: workers + yandex-parallel + 4, at least 16)')
+    sync.add_argument('--http-retries', type=int, default=4,
+                      help='retries for throttled (429, honoring Retry-After) or failed requests')
+    sync.add_argument('--threshold', type=int, default=70, help='minimum match score')
+    sync.add_argument('--tiers', metavar='SPEC',
+                      help='search tiers tried in order until a confident match, as filter:limit[:plain|translit],... '
+                           '(default: songs:3,songs:10,songs:5:translit,videos:5)')
+    sync.add_argument('--incremental', action='store_true', help='only process likes not synced before')
+    sync.add_argument('--no-resume', action='store_true', help='start over instead of resuming')
+    sync.add_argument('--no-journal', action='store_true', help='do not checkpoint progress')
+    sync.add_argument('--dry-run', action='store_true', help='match tracks but do not modify any playlist')
+    sync.add_argument('--json', action='store_true', help='emit JSON lines instead of text')
+    sync.add_argument('--report', default=RUN_REPORT_FILE, help='JSON run report with timings and counters')
+    sync.add_argument('--prometheus', metavar='PATH', help='also write metrics in Prometheus text format')
+    sync.add_argument('--profile', metavar='DIR', help='cProfile the pipeline stages into DIR')
+    sync.set_defaults(func=cmd_sync)
+
+    jobs = sub.add_parser('jobs', help='run transfers for several accounts in parallel')
+    jobs.add_argument('jobs_file', help='JSON list of {name, yandex_token, headers, playlist | new_playlist, '
+                                        'workers, rate_limit}')
+    jobs.add_argument('--parallel', type=int, default=4, help='accounts processed at the same time')
+    jobs.add_argument('--incremental', action='store_true', help='only process likes not synced before')
+    jobs.add_argument('--report', help='write the aggregate report as JSON to this path')
+    jobs.set_defaults(func=cmd_jobs)
+
+    cache = sub.add_parser('cache', help='export or merge portable match cache files')
+    cache.add_argument('action', choices=['export', 'import'])
+    cache.add_argument('file', help='cache file; gzip-compressed when the name ends with .gz')
+    cache.add_argument('--db', default='music_cache.db', help='local cache database')
+    cache.add_argument('--on-conflict', choices=['best', 'keep', 'replace', 'newer'], default='best',
+                       help='import: which row wins for keys already cached (best = higher score, hits over misses)')
+    cache.add_argument('--no-misses', action='store_true', help='export: leave out remembered "not found" results')
+    cache.add_argument('--no-candidates', action='store_true', help='export: leave out scored candidates (smaller file)')
+    cache.set_defaults(func=cmd_cache)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted; rerun to resume from the last checkpoint.")
+        return 130
+    except Exception as e:
+        print(f"💥 Error: {e}")
+        return 2
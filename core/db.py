@@ -1,43 +1,375 @@
+import json
 import sqlite3
-from .track import Track
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .track import Track, ARTIST_SEPARATOR
+from .metrics import METRICS
+
+# SQLite builds older than 3.32 cap bound parameters at 999 per statement
+_MAX_PARAMS = 900
+
+# Ordered schema migrations; index + 1 is the resulting PRAGMA user_version
+_MIGRATIONS = [
+    # v1: original layout, a plain key -> video id mapping
+    '''
+    CREATE TABLE IF NOT EXISTS track_mapping (
+        yandex_key TEXT PRIMARY KEY,
+        youtube_id TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # v2: match metadata; rows with youtube_id IS NULL are cached "not found" results
+    '''
+    ALTER TABLE track_mapping ADD COLUMN score REAL;
+    ALTER TABLE track_mapping ADD COLUMN query TEXT;
+    ALTER TABLE track_mapping ADD COLUMN candidates TEXT;
+    ''',
+    # v3: video IDs the playlist endpoint refused, so they are never sent again
+    '''
+    CREATE TABLE IF NOT EXISTS rejected_ids (
+        youtube_id TEXT PRIMARY KEY,
+        reason TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    # v4: Yandex track metadata by ID, so exports only download tracks never seen before
+    '''
+    CREATE TABLE IF NOT EXISTS track_metadata (
+        track_id TEXT PRIMARY KEY,
+        artist TEXT,
+        name TEXT,
+        duration_ms INTEGER,
+        updated REAL
+    )
+    ''',
+    # v5: metadata cached when only the first artist was kept is downloaded again with all of them
+    'DELETE FROM track_metadata',
+]
+
+_COLUMNS = 'yandex_key, youtube_id, score, query, candidates, CAST(strftime(\'%s\', timestamp) AS INTEGER)'
+
+# When an imported row's key already exists: the SQL condition under which the incoming row wins
+CONFLICT_RULES = {
+    'keep': 'false',
+    'replace': 'true',
+    # A hit beats a miss; between two hits the higher score wins
+    'best': '(excluded.youtube_id IS NOT NULL AND (track_mapping.youtube_id IS NULL '
+            'OR COALESCE(excluded.score, 0) > COALESCE(track_mapping.score, 0)))',
+    'newer': 'excluded.timestamp > track_mapping.timestamp',
+}
+
+# (key, youtube_id, score, query, candidates JSON, unix timestamp) as stored in track_mapping
+Row = Tuple[str, Optional[str], Optional[float], Optional[str], Optional[str], Optional[int]]
+
+
+def apply_migrations(conn: sqlite3.Connection, migrations: List[str], version: Optional[int] = None):
+    """Runs the migrations past the stored PRAGMA user_version, one transaction each."""
+    if version is None:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, script in enumerate(migrations[version:], start=version + 1):
+        with conn:
+            for statement in filter(str.strip, script.split(';')):
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {target}')
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Opens a WAL-mode connection meant to be shared between threads under a lock."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _legacy_key(track: Track) -> str:
+    # The original tool stored only the first artist
+    return f"{track.artist.split(ARTIST_SEPARATOR, 1)[0]} - {track.name}".lower()
+
+
+def _make_key(track: Track) -> str:
+    # The stable source ID avoids collisions between different tracks with the same artist and title
+    return f"ym:{track.track_id}" if track.track_id else _legacy_key(track)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """A cached search outcome; youtube_id is None for a remembered miss."""
+    youtube_id: Optional[str]
+    score: Optional[float] = None
+    query: Optional[str] = None
+    candidates: List[dict] = field(default_factory=list)
+    timestamp: Optional[float] = None
+
+    @property
+    def found(self) -> bool:
+        return self.youtube_id is not None
 
 
 class MusicCache:
     """Manages local caching of Yandex Music to YouTube Music ID mappings."""
 
-    def __init__(self, db_path='music_cache.db'):
+    def __init__(self, db_path='music_cache.db', flush_size: int = 500, negative_ttl: float = 7 * 86400,
+                 metadata_ttl: float = 30 * 86400):
         self.db_path = db_path
+        self.flush_size = flush_size
+        # Misses older than this (seconds) are ignored so the track gets searched again
+        self.negative_ttl = negative_ttl
+        # Source metadata older than this (seconds) is downloaded again
+        self.metadata_ttl = metadata_ttl
+        self._lock = threading.RLock()
+        self._pending: Dict[str, CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+        self._conn = self._get_connection()
         self._create_table()
 
+    @staticmethod
+    def key(track: Track) -> str:
+        """The cache key a track is stored under."""
+        return _make_key(track)
+
     def _get_connection(self):
-        """Returns a standard sqlite3 connection."""
-        return sqlite3.connect(self.db_path)
+        """Returns a single sqlite3 connection shared (under a lock) by all threads."""
+        return connect(self.db_path)
 
     def _create_table(self):
-        """Initializes the database schema if it doesn't exist."""
-        with self._get_connection() as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS track_mapping (
-                    yandex_key TEXT PRIMARY KEY,
-                    youtube_id TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+        """Initializes the schema and applies any pending migrations."""
+        with self._lock:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version == 0 and self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='track_mapping'").fetchone():
+                # Caches created before versioning was introduced
+                version = 1
+            apply_migrations(self._conn, _MIGRATIONS, version)
+
+    @property
+    def schema_version(self) -> int:
+        with self._lock:
+            return self._conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def _row_to_entry(self, row) -> Optional[CacheEntry]:
+        _, youtube_id, score, query, candidates, ts = row
+        if youtube_id is None and (ts is None or time.time() - ts > self.negative_ttl):
+            return None
+        return CacheEntry(youtube_id, score, query, json.loads(candidates) if candidates else [], ts)
+
+    def _count(self, hits: int, lookups: int):
+        self.hits += hits
+        self.misses += lookups - hits
+        METRICS.inc('cache.hits', hits)
+        METRICS.inc('cache.misses', lookups - hits)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_entry(self, track: Track) -> Optional[CacheEntry]:
+        """Returns the cached outcome for a track, skipping expired misses."""
+        return self.get_entries([track]).get(track)
+
+    def _select(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        found: Dict[str, CacheEntry] = {}
+        for i in range(0, len(keys), _MAX_PARAMS):
+            chunk = keys[i:i + _MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self._conn.execute(
+                    f'SELECT {_COLUMNS} FROM track_mapping WHERE yandex_key IN ({placeholders})', chunk):
+                entry = self._row_to_entry(row)
+                if entry:
+                    found[row[0]] = entry
+        return found
+
+    def get_entries(self, tracks: Iterable[Track]) -> Dict[Track, CacheEntry]:
+        """Resolves cached outcomes (hits and fresh misses) for a batch of tracks.
+
+        Tracks with a source ID fall back to rows written under the old "artist - name" key;
+        such rows are copied to the ID key so the fallback is needed only once.
+        """
+        by_key: Dict[str, List[Track]] = {}
+        for track in tracks:
+            by_key.setdefault(_make_key(track), []).append(track)
+        legacy = {key: _legacy_key(group[0]) for key, group in by_key.items() if group[0].track_id}
+
+        result: Dict[Track, CacheEntry] = {}
+        with self._lock, METRICS.timer('cache.get_entries'):
+            found = self._select(list(by_key) + list(set(legacy.values())))
+            # Buffered writes are newer than anything on disk
+            found.update((k, v) for k, v in self._pending.items() if k in by_key)
+            promoted = []
+            for key, group in by_key.items():
+                entry = found.get(key)
+                if entry is None and key in legacy:
+                    entry = found.get(legacy[key])
+                    if entry:
+                        promoted.append((key, entry))
+                if entry:
+                    result.update((t, entry) for t in group)
+            self._pending.update(promoted)
+            self._count(len({_make_key(t) for t in result}), len(by_key))
+        return result
 
     def get_youtube_id(self, track: Track):
         """Retrieves a cached YouTube Video ID for a given Track object."""
-        key = f"{track.artist} - {track.name}".lower()
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT youtube_id FROM track_mapping WHERE yandex_key = ?', (key,))
-            row = cursor.fetchone()
-            return row[0] if row else None
-
-    def save_mapping(self, track: Track, youtube_id: str):
+        entry = self.get_entry(track)
+        return entry.youtube_id if entry else None
+
+    def get_many(self, tracks: Iterable[Track]) -> Dict[Track, str]:
+        """Resolves cached YouTube IDs for a whole batch of tracks, ignoring misses."""
+        return {track: entry.youtube_id for track, entry in self.get_entries(tracks).items() if entry.found}
+
+    def _write(self, rows):
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO track_mapping (yandex_key, youtube_id, score, query, candidates) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ((key, e.youtube_id, e.score, e.query, json.dumps(e.candidates) if e.candidates else None)
+             for key, e in rows)
+        )
+
+    def save_mapping(self, track: Track, youtube_id: str, score: Optional[float] = None,
+                     query: Optional[str] = None, candidates: Optional[List[dict]] = None):
         """Caches the mapping between a Yandex track and a YouTube Video ID."""
-        key = f"{track.artist} - {track.name}".lower()
-        with self._get_connection() as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO track_mapping (yandex_key, youtube_id) VALUES (?, ?)',
-                (key, youtube_id)
-            )
\ No newline at end of file
+        entry = CacheEntry(youtube_id, score, query, candidates or [])
+        with self._lock, self._conn:
+            self._pending.pop(_make_key(track), None)
+            self._write([(_make_key(track), entry)])
+
+    def save_miss(self, track: Track, query: Optional[str] = None, candidates: Optional[List[dict]] = None):
+        """Remembers that a search produced no acceptable match."""
+        self.save_many([(track, CacheEntry(None, None, query, candidates or []))])
+
+    def save_many(self, entries: Iterable[Tuple[Track, CacheEntry]]):
+        """Buffers entries and writes them in one transaction once flush_size is reached."""
+        with self._lock:
+            for track, entry in entries:
+                self._pending[_make_key(track)] = entry
+            if len(self._pending) >= self.flush_size:
+                self.flush()
+
+    def get_metadata(self, track_ids: Iterable[str]) -> Dict[str, Track]:
+        """Returns cached, still-fresh source metadata keyed by track ID."""
+        ids = list(set(track_ids))
+        cutoff = time.time() - self.metadata_ttl
+        found: Dict[str, Track] = {}
+        with self._lock, METRICS.timer('cache.get_metadata'):
+            for i in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[i:i + _MAX_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                for tid, artist, name, duration in self._conn.execute(
+                        f'SELECT track_id, artist, name, duration_ms FROM track_metadata '
+                        f'WHERE track_id IN ({placeholders}) AND updated >= ?', (*chunk, cutoff)):
+                    found[tid] = Track(artist, name, duration or 0, tid)
+        return found
+
+    def save_metadata(self, tracks: Iterable[Track]):
+        """Stores source metadata for tracks that carry a track_id."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO track_metadata (track_id, artist, name, duration_ms, updated) '
+                'VALUES (?, ?, ?, ?, ?)',
+                ((t.track_id, t.artist, t.name, t.duration_ms, now) for t in tracks if t.track_id))
+
+    def save_rejection(self, youtube_id: str, reason: str):
+        """Records that the server refused to add a video ID to a playlist."""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO rejected_ids (youtube_id, reason) VALUES (?, ?)',
+                               (youtube_id, reason))
+
+    def get_rejected(self, youtube_ids: Iterable[str]) -> Dict[str, str]:
+        """Returns {video_id: reason} for the IDs that were previously rejected."""
+        ids = list(set(youtube_ids))
+        found: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[i:i + _MAX_PARAMS]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._conn.execute(
+                    f'SELECT youtube_id, reason FROM rejected_ids WHERE youtube_id IN ({placeholders})', chunk))
+        return found
+
+    @property
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._pending and self._conn.execute('SELECT 1 FROM track_mapping LIMIT 1').fetchone() is None
+
+    def iter_rows(self, include_misses: bool = True, include_candidates: bool = True) -> Iterator[Row]:
+        """Streams stored mappings in key order; misses past negative_ttl are left out."""
+        self.flush()
+        cutoff = int(time.time() - self.negative_ttl)
+        where = 'youtube_id IS NOT NULL' if not include_misses else \
+            f'youtube_id IS NOT NULL OR CAST(strftime(\'%s\', timestamp) AS INTEGER) >= {cutoff}'
+        with self._lock:
+            # A separate cursor keeps memory flat; rows are fetched in pages while the lock is held
+            cursor = self._conn.execute(f'SELECT {_COLUMNS} FROM track_mapping WHERE {where} ORDER BY yandex_key')
+            while True:
+                page = cursor.fetchmany(5000)
+                if not page:
+                    return
+                for key, youtube_id, score, query, candidates, ts in page:
+                    yield key, youtube_id, score, query, candidates if include_candidates else None, ts
+
+    def merge_rows(self, rows: Iterable[Row], on_conflict: str = 'best', batch_size: int = 5000) -> Dict[str, int]:
+        """Bulk-merges rows (e.g. from another machine's cache) and returns inserted/updated/unchanged counts.
+
+        Rows are staged in a temporary table and merged with one upsert, so a million-row import is a
+        single pass over the primary-key index rather than a lookup per row.
+        """
+        if on_conflict not in CONFLICT_RULES:
+            raise ValueError(f"Unknown conflict rule '{on_conflict}', expected one of {', '.join(CONFLICT_RULES)}")
+        self.flush()
+        with self._lock, METRICS.timer('cache.merge'):
+            conn = self._conn
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS import_rows (yandex_key TEXT PRIMARY KEY, '
+                         'youtube_id TEXT, score REAL, query TEXT, candidates TEXT, ts INTEGER)')
+            with conn:
+                conn.execute('DELETE FROM import_rows')
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        conn.executemany('INSERT OR REPLACE INTO import_rows VALUES (?, ?, ?, ?, ?, ?)', batch)
+                        batch.clear()
+                conn.executemany('INSERT OR REPLACE INTO import_rows VALUES (?, ?, ?, ?, ?, ?)', batch)
+                # Duplicate keys within the input collapse to the last occurrence
+                total = conn.execute('SELECT COUNT(*) FROM import_rows').fetchone()[0]
+
+                inserted = conn.execute('SELECT COUNT(*) FROM import_rows i WHERE NOT EXISTS '
+                                        '(SELECT 1 FROM track_mapping m WHERE m.yandex_key = i.yandex_key)').fetchone()[0]
+                before = conn.total_changes
+                # "WHERE true" resolves the parser ambiguity between a join and the ON CONFLICT clause
+                conn.execute(
+                    'INSERT INTO track_mapping (yandex_key, youtube_id, score, query, candidates, timestamp) '
+                    'SELECT yandex_key, youtube_id, score, query, candidates, '
+                    'COALESCE(datetime(ts, \'unixepoch\'), CURRENT_TIMESTAMP) FROM import_rows WHERE true '
+                    'ON CONFLICT(yandex_key) DO UPDATE SET youtube_id = excluded.youtube_id, '
+                    'score = excluded.score, query = excluded.query, candidates = excluded.candidates, '
+                    f'timestamp = excluded.timestamp WHERE {CONFLICT_RULES[on_conflict]}')
+                changed = conn.total_changes - before
+                conn.execute('DELETE FROM import_rows')
+            conn.execute('PRAGMA optimize')
+        return {'rows': total, 'inserted': inserted, 'updated': changed - inserted,
+                'unchanged': total - changed}
+
+    def flush(self):
+        """Writes all buffered entries to disk in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._conn, METRICS.timer('cache.flush'):
+                self._write(self._pending.items())
+            self._pending.clear()
+
+    def close(self):
+        """Flushes pending writes and releases the connection."""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
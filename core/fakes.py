@@ -0,0 +1,266 @@
+import hashlib
+import io
+import itertools
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from .track import Track
+
+
+class SimulatedHTTPError(Exception):
+    """Raised by the fake backends for injected failures; mirrors an HTTP error response."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"Server returned HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class SimulatedNetwork:
+    """Latency, random failures and a server-side rate cap shared by the fake clients."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 max_rps: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Requests above this rate are answered with HTTP 429; 0 disables throttling
+        self.max_rps = max_rps
+        self.calls: Dict[str, int] = {}
+        self.throttled = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+
+    def request(self, method: str):
+        """Accounts for one API call and applies the configured delays and failures."""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_calls = now, 0
+            self._window_calls += 1
+            throttled = self.max_rps > 0 and self._window_calls > self.max_rps
+            failed = not throttled and self._rng.random() < self.error_rate
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            if throttled:
+                self.throttled += 1
+            elif failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            raise SimulatedHTTPError(429, retry_after=1.0)
+        if failed:
+            raise SimulatedHTTPError(503)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class SimulatedAdapter(BaseAdapter):
+    """Answers HTTP requests from a SimulatedNetwork, so injected 429/503s meet a session's retry logic."""
+
+    def __init__(self, network: SimulatedNetwork):
+        super().__init__()
+        self.network = network
+
+    def send(self, request, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.request, response.url = request, request.url
+        response.raw = io.BytesIO(b'')
+        try:
+            self.network.request(urlsplit(request.url).path.strip('/'))
+            response.status_code = 200
+        except SimulatedHTTPError as e:
+            response.status_code = e.status
+            if e.retry_after is not None:
+                response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeYTMusic:
+    """In-memory stand-in for ytmusicapi.YTMusic used for offline runs and tests."""
+
+    def __init__(self, catalog: Iterable[Track] = (), network: Optional[SimulatedNetwork] = None,
+                 session: Optional[requests.Session] = None):
+        self.network = network or SimulatedNetwork()
+        # With a session (e.g. PooledSession), calls go through its retries like ytmusicapi's POSTs do
+        self.session = session
+        if session is not None:
+            session.mount('http://ytmusic.fake/', SimulatedAdapter(self.network))
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.songs: List[dict] = []
+        self._index: Dict[str, List[dict]] = {}
+        self.playlists: Dict[str, dict] = {}
+        # Video IDs the playlist endpoint refuses; a batch containing one fails as a whole, like the real API
+        self.unavailable: Set[str] = set()
+        for track in catalog:
+            self.add_song(track)
+
+    @property
+    def calls(self) -> Dict[str, int]:
+        return self.network.calls
+
+    def _request(self, method: str):
+        if self.session is None:
+            self.network.request(method)
+            return
+        response = self.session.post(f'http://ytmusic.fake/{method}')
+        if response.status_code >= 400:
+            raise SimulatedHTTPError(response.status_code)
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return text.lower().replace('-', ' ').split()
+
+    def add_song(self, track: Track) -> str:
+        """Registers a track in the fake catalog and returns its videoId."""
+        with self._lock:
+            video_id = f"vid{next(self._ids):08d}"
+            song = {
+                'videoId': video_id,
+                'title': track.name,
+                'artists': [{'name': track.artist}],
+                'duration_seconds': track.duration_ms // 1000,
+                'resultType': 'song',
+            }
+            self.songs.append(song)
+            for word in set(self._words(f"{track.artist} {track.name}")):
+                self._index.setdefault(word, []).append(song)
+        return video_id
+
+    def search(self, query: str, filter: Optional[str] = None, limit: int = 20) -> List[dict]:
+        self._request('search')
+        words = set(self._words(query))
+        postings = [self._index[w] for w in words if w in self._index]
+        if not postings:
+            return []
+        # Scan only the rarest word's postings; keeps lookups cheap on 100k+ catalogs
+        scored = []
+        for song in min(postings, key=len):
+            overlap = len(words.intersection(self._words(f"{song['artists'][0]['name']} {song['title']}")))
+            scored.append((overlap, song))
+        scored.sort(key=lambda x: -x[0])
+        return [dict(song) for _, song in scored[:limit]]
+
+    def get_library_playlists(self, limit: int = 25) -> List[dict]:
+        self._request('get_library_playlists')
+        return [{'playlistId': pid, 'title': pl['title']} for pid, pl in list(self.playlists.items())[:limit]]
+
+    def create_playlist(self, title: str, description: str, **kwargs) -> str:
+        self._request('create_playlist')
+        with self._lock:
+            playlist_id = f"PL{next(self._ids):08d}"
+            self.playlists[playlist_id] = {'title': title, 'tracks': []}
+        return playlist_id
+
+    def get_playlist(self, playlistId: str, limit: Optional[int] = 100, **kwargs) -> dict:
+        self._request('get_playlist')
+        playlist = self.playlists.setdefault(playlistId, {'title': playlistId, 'tracks': []})
+        items = playlist['tracks'] if limit is None else playlist['tracks'][:limit]
+        return {'id': playlistId, 'title': playlist['title'], 'trackCount': len(playlist['tracks']),
+                'tracks': [{'videoId': v} for v in items]}
+
+    def add_playlist_items(self, playlistId: str, videoIds: List[str], **kwargs) -> dict:
+        self._request('add_playlist_items')
+        playlist = self.playlists.setdefault(playlistId, {'title': playlistId, 'tracks': []})
+        if self.unavailable.intersection(videoIds):
+            return {'status': 'STATUS_FAILED'}
+        playlist['tracks'].extend(videoIds)
+        return {'status': 'STATUS_SUCCEEDED'}
+
+
+class FakeYandexClient:
+    """In-memory stand-in for yandex_music.Client exposing the calls the exporter uses."""
+
+    def __init__(self, liked: Iterable[Track] = (), network: Optional[SimulatedNetwork] = None, uid: int = 1,
+                 playlists: Optional[Dict[str, List[Track]]] = None, albums: Optional[Dict[str, List[Track]]] = None):
+        self.network = network or SimulatedNetwork()
+        self.me = SimpleNamespace(account=SimpleNamespace(uid=uid))
+        self.tracks_by_id: Dict[str, Track] = {}
+        self._ids_by_track: Dict[Track, str] = {}
+        # (track_id, timestamp), newest first like the real API
+        self.likes: List[tuple] = []
+        for track in liked:
+            self.like(track)
+        # title -> track IDs; the same Track always maps to the same ID across collections
+        self.playlists = {title: [self._register(t) for t in tracks] for title, tracks in (playlists or {}).items()}
+        self.albums = {title: [self._register(t) for t in tracks] for title, tracks in (albums or {}).items()}
+
+    @staticmethod
+    def track_id(track: Track) -> str:
+        """Catalog-wide ID derived from the track, so every fake account agrees on it like real Yandex does."""
+        digest = hashlib.blake2b(f"{track.artist}\0{track.name}\0{track.duration_ms}".encode(), digest_size=8)
+        return str(int.from_bytes(digest.digest(), 'big'))
+
+    def _register(self, track: Track) -> str:
+        track_id = self._ids_by_track.get(track)
+        if track_id is None:
+            track_id = self.track_id(track)
+            self.tracks_by_id[track_id] = track
+            self._ids_by_track[track] = track_id
+        return track_id
+
+    def _full(self, track_id: str):
+        t = self.tracks_by_id[str(track_id)]
+        return SimpleNamespace(id=str(track_id), title=t.name, duration_ms=t.duration_ms,
+                               artists=[SimpleNamespace(name=t.artist)])
+
+    def like(self, track: Track) -> str:
+        """Adds a track to the liked collection as the newest like."""
+        track_id = self._register(track)
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(1_600_000_000 + len(self.tracks_by_id)))
+        self.likes.insert(0, (track_id, f"{timestamp}+00:00"))
+        return track_id
+
+    def users_likes_tracks(self):
+        self.network.request('users_likes_tracks')
+        return SimpleNamespace(tracks=[SimpleNamespace(track_id=tid, id=tid, timestamp=ts) for tid, ts in self.likes])
+
+    def tracks(self, track_ids: List[str]):
+        self.network.request('tracks')
+        return [self._full(tid) for tid in track_ids]
+
+    def users_playlists_list(self):
+        self.network.request('users_playlists_list')
+        return [SimpleNamespace(kind=i, title=title, track_count=len(ids))
+                for i, (title, ids) in enumerate(self.playlists.items(), start=1000)]
+
+    def users_playlists(self, kind):
+        self.network.request('users_playlists')
+        title = list(self.playlists)[int(kind) - 1000]
+        # Like the real API, playlist items carry full track objects
+        return SimpleNamespace(kind=kind, title=title,
+                               tracks=[SimpleNamespace(id=tid, track=self._full(tid)) for tid in self.playlists[title]])
+
+    def users_likes_albums(self):
+        self.network.request('users_likes_albums')
+        return [SimpleNamespace(album=SimpleNamespace(id=i, title=title))
+                for i, title in enumerate(self.albums, start=5000)]
+
+    def albums_with_tracks(self, album_id):
+        self.network.request('albums_with_tracks')
+        title = list(self.albums)[int(album_id) - 5000]
+        return SimpleNamespace(id=album_id, title=title, volumes=[[self._full(tid) for tid in self.albums[title]]])
+
+
+def synthetic_library(size: int, seed: int = 0) -> List[Track]:
+    """Builds a reproducible library of distinct tracks for benchmarks."""
+    rng = random.Random(seed)
+    return [Track(f"Artist {i % max(1, size // 10)}", f"Song {i}", rng.randint(120, 360) * 1000)
+            for i in range(size)]
@@ -0,0 +1,170 @@
+import random
+import re
+import time
+from typing import Callable, Dict, List, Optional
+from .metrics import METRICS
+
+
+_HTTP_STATUS = re.compile(r'\bHTTP (\d{3})\b')
+
+
+class InsertRefused(Exception):
+    """The server answered the add request but did not confirm it."""
+
+
+def _http_status(exc: Exception) -> Optional[int]:
+    status = getattr(exc, 'status', None) or getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status is None:
+        # ytmusicapi only puts the status into the message ("Server returned HTTP 400: ...")
+        match = _HTTP_STATUS.search(str(exc))
+        status = int(match.group(1)) if match else None
+    return status
+
+
+def _is_throttle(exc: Exception) -> bool:
+    if _http_status(exc) == 429:
+        return True
+    text = str(exc).lower()
+    return 'too many requests' in text or 'rate limit' in text
+
+
+def _is_refusal(exc: Exception) -> bool:
+    """True when the request was answered and refused because of its content, i.e. one of the IDs.
+
+    Transport errors, 5xx, auth failures or an open circuit say nothing about the IDs and must
+    never lead to a persisted rejection.
+    """
+    return isinstance(exc, InsertRefused) or _http_status(exc) in (400, 404)
+
+
+class InsertScheduler:
+    """Adds video IDs to a playlist with adaptive batch sizes, backoff and bisection of bad batches."""
+
+    def __init__(self, ytmusic, cache=None, batch_size: int = 20, min_batch: int = 1, max_batch: int = 100,
+                 base_delay: float = 0.8, max_delay: float = 60.0, max_throttle_retries: int = 6):
+        self.ytmusic = ytmusic
+        # Known-bad IDs are persisted here so they are never sent again
+        self.cache = cache
+        self.batch_size = batch_size
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_throttle_retries = max_throttle_retries
+        self.delay = base_delay
+        self.rejections: Dict[str, str] = {}
+        self.calls = 0
+
+    def _sleep(self, seconds: float):
+        if seconds > 0:
+            with METRICS.phase('insert.sleep'):
+                time.sleep(seconds)
+
+    def _on_success(self):
+        # Additive increase / multiplicative decrease, like TCP congestion control
+        self.batch_size = min(self.max_batch, self.batch_size + max(1, self.batch_size // 4))
+        self.delay = max(self.base_delay, self.delay * 0.8)
+
+    def _on_throttle(self, exc: Exception, attempt: int):
+        self.batch_size = max(self.min_batch, self.batch_size // 2)
+        retry_after = getattr(exc, 'retry_after', None)
+        backoff = min(self.max_delay, max(self.delay, 1.0) * 2 ** attempt)
+        self.delay = min(self.max_delay, max(retry_after or 0.0, backoff * random.uniform(0.5, 1.0)))
+
+    def _add(self, playlist_id: str, chunk: List[str]):
+        """One API call; raises on any failure, including a non-confirmed status."""
+        self.calls += 1
+        with METRICS.timer('ytmusic.add_playlist_items'):
+            res = self.ytmusic.add_playlist_items(playlist_id, chunk)
+        if not res or res.get('status') != 'STATUS_SUCCEEDED':
+            raise InsertRefused(f"Operation status not confirmed: {res.get('status') if res else res}")
+
+    def _reject(self, video_id: str, reason: str, stats: dict):
+        print(f"❌ Track {video_id} rejected by server: {reason}")
+        self.rejections[video_id] = reason
+        stats['failed'] += 1
+        METRICS.inc('insert.rejected')
+        if self.cache:
+            self.cache.save_rejection(video_id, reason)
+
+    def _send(self, playlist_id: str, chunk: List[str], stats: dict, added: List[str],
+              on_added: Optional[Callable[[List[str]], None]] = None) -> Optional[Exception]:
+        """Sends a chunk, retrying throttling with backoff. Returns the non-throttle error, if any."""
+        for attempt in range(self.max_throttle_retries + 1):
+            try:
+                self._add(playlist_id, chunk)
+            except Exception as e:
+                if not _is_throttle(e):
+                    self._sleep(self.delay)
+                    return e
+                METRICS.inc('insert.throttle_retries')
+                self._on_throttle(e, attempt)
+                print(f"⏳ Throttled, retrying in {self.delay:.1f}s (batch size now {self.batch_size})")
+                self._sleep(self.delay)
+                continue
+            stats['added'] += len(chunk)
+            added.extend(chunk)
+            # Reported before the pause, so a crash while sleeping cannot lose a confirmed insert
+            if on_added:
+                on_added(chunk)
+            self._on_success()
+            self._sleep(self.delay)
+            return None
+        return TimeoutError("Throttling persisted after retries")
+
+    def _bisect(self, playlist_id: str, chunk: List[str], stats: dict, added: List[str],
+                error: Exception, on_added: Optional[Callable[[List[str]], None]] = None) -> Optional[Exception]:
+        """Splits a refused chunk in halves until the offending IDs are isolated.
+
+        Returns the first error that is not a refusal (throttling, transport, 5xx); bisection stops there.
+        """
+        if len(chunk) == 1:
+            # A single ID refused by the server: the only case that is persisted
+            self._reject(chunk[0], str(error), stats)
+            return None
+        METRICS.inc('insert.bisections')
+        mid = len(chunk) // 2
+        for half in (chunk[:mid], chunk[mid:]):
+            err = self._send(playlist_id, half, stats, added, on_added)
+            if err is None:
+                continue
+            if not _is_refusal(err):
+                return err
+            err = self._bisect(playlist_id, half, stats, added, err, on_added)
+            if err:
+                return err
+        return None
+
+    def insert(self, playlist_id: str, video_ids: List[str], stats: dict,
+               on_added: Optional[Callable[[List[str]], None]] = None) -> List[str]:
+        """Inserts all IDs in order, skipping known-rejected ones. Returns the IDs actually added.
+
+        A failure that is not the IDs' fault stops the insert; the unsent IDs are counted as failed
+        (not rejected), so a later run retries them. on_added gets each chunk the server confirmed.
+        """
+        known_bad = dict(self.rejections)
+        if self.cache:
+            known_bad.update(self.cache.get_rejected(video_ids))
+        pending = [v for v in video_ids if v not in known_bad]
+        if len(pending) < len(video_ids):
+            skipped = len(video_ids) - len(pending)
+            stats['failed'] += skipped
+            print(f"⛔ {skipped} previously rejected tracks skipped")
+
+        added: List[str] = []
+        i = 0
+        while i < len(pending):
+            chunk = pending[i:i + self.batch_size]
+            error = self._send(playlist_id, chunk, stats, added, on_added)
+            if error and _is_refusal(error):
+                print(f"⚠️ Batch of {len(chunk)} refused ({error}). Bisecting...")
+                error = self._bisect(playlist_id, chunk, stats, added, error, on_added)
+            if error:
+                done = set(added)
+                unsent = [v for v in pending[i:] if v not in done and v not in self.rejections]
+                stats['failed'] += len(unsent)
+                METRICS.inc('insert.aborted')
+                print(f"⚠️ Insert stopped, {len(unsent)} tracks left for the next run: {error}")
+                break
+            i += len(chunk)
+        return added
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from .db import MusicCache
+from .journal import TransferJournal
+from .state import SyncState
+
+
+@dataclass
+class TransferJob:
+    """One account's transfer: its credentials, target and request budget."""
+    name: str
+    yandex_token: str
+    headers: str
+    playlist_id: Optional[str] = None
+    new_playlist: Optional[str] = None
+    workers: int = 4
+    rate_limit: float = 5.0
+
+
+def load_jobs(path: str) -> List[TransferJob]:
+    """Reads a JSON list of job objects (see TransferJob fields)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    jobs = []
+    for i, item in enumerate(raw):
+        job = TransferJob(name=item.get('name') or f"job{i + 1}", yandex_token=item['yandex_token'],
+                          headers=item['headers'], playlist_id=item.get('playlist'),
+                          new_playlist=item.get('new_playlist'), workers=item.get('workers', 4),
+                          rate_limit=item.get('rate_limit', 5.0))
+        if not job.playlist_id and not job.new_playlist:
+            raise ValueError(f"Job '{job.name}' needs either 'playlist' or 'new_playlist'")
+        jobs.append(job)
+    return jobs
+
+
+class JobRunner:
+    """Runs many accounts' transfers in parallel over one shared cache, each with its own rate limiter and session."""
+
+    def __init__(self, jobs: List[TransferJob], cache: Optional[MusicCache] = None, max_parallel: int = 4,
+                 journal: Optional[TransferJournal] = None, state: Optional[SyncState] = None,
+                 incremental: bool = False, exporter_factory=None, importer_factory=None):
+        self.jobs = jobs
+        self.cache = cache or MusicCache()
+        self.max_parallel = max(1, max_parallel)
+        self.journal = journal
+        self.state = state
+        self.incremental = incremental
+        # Factories default to the real API clients; overridable for offline runs
+        self.exporter_factory = exporter_factory or self._default_exporter
+        self.importer_factory = importer_factory or self._default_importer
+        # cache key -> job that searched it first, to attribute cross-account reuse
+        self.origins: Dict[str, str] = {}
+        self._sessions: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, job: TransferJob):
+        """One HTTP session per account, so one account's 429 pauses or open breaker never stall the others."""
+        from .transport import PooledSession
+        with self._lock:
+            session = self._sessions.get(job.name)
+            if session is None:
+                session = self._sessions[job.name] = PooledSession(pool_size=max(16, job.workers + 8))
+            return session
+
+    def _default_exporter(self, job: TransferJob, cache: MusicCache):
+        from .yandex import YandexMusicExporter
+        return YandexMusicExporter(job.yandex_token, metadata_cache=cache, session=self._session(job))
+
+    def _default_importer(self, job: TransferJob, cache: MusicCache):
+        from .youtube import YoutubeImporter
+        return YoutubeImporter(auth_file=job.headers, workers=job.workers, rate_limit=job.rate_limit, cache=cache,
+                               session=self._session(job))
+
+    def _run_one(self, job: TransferJob) -> dict:
+        from .pipeline import run_liked_transfer
+        started = time.monotonic()
+        result = {'name': job.name}
+        try:
+            exporter = self.exporter_factory(job, self.cache)
+            importer = self.importer_factory(job, self.cache)
+            importer.account = job.name
+            importer.shared_origins = self.origins
+            playlist_id = job.playlist_id or importer.ytmusic.create_playlist(job.new_playlist, "Automated Import")
+            stats = run_liked_transfer(exporter, importer, playlist_id, journal=self.journal, state=self.state,
+                                       incremental=self.incremental)
+            result.update(playlist_id=playlist_id, stats=stats or {}, counters=dict(importer.counters))
+            print(f"✅ [{job.name}] finished: {stats}")
+        except Exception as e:
+            print(f"❌ [{job.name}] failed: {e}")
+            result['error'] = str(e)
+        result['seconds'] = round(time.monotonic() - started, 2)
+        return result
+
+    def run(self) -> dict:
+        """Runs all jobs and returns per-job results plus aggregate throughput and cache reuse."""
+        started = time.monotonic()
+        print(f"🗂️ Running {len(self.jobs)} jobs, up to {self.max_parallel} in parallel")
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            results = list(pool.map(self._run_one, self.jobs))
+        self.cache.flush()
+        elapsed = time.monotonic() - started
+
+        tracks = sum(sum(r.get('stats', {}).values()) for r in results)
+        hits = sum(r.get('counters', {}).get('cache_hits', 0) for r in results)
+        searches = sum(r.get('counters', {}).get('searches', 0) for r in results)
+        cross = sum(r.get('counters', {}).get('cross_account_hits', 0) for r in results)
+        lookups = hits + searches
+        return {
+            'jobs': results,
+            'failed_jobs': sum(1 for r in results if 'error' in r),
+            'seconds': round(elapsed, 2),
+            'tracks': tracks,
+            'tracks_per_sec': round(tracks / elapsed, 1) if elapsed else None,
+            'cache_hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'cross_account_hit_rate': round(cross / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,154 @@
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .db import apply_migrations, connect
+from .track import Track
+
+# Per-track lifecycle: listed -> exported -> matched -> queued -> inserted, or one of the terminal outcomes
+LISTED, EXPORTED, MATCHED, QUEUED, INSERTED = 'listed', 'exported', 'matched', 'queued', 'inserted'
+NOT_FOUND, SKIPPED, FAILED = 'not_found', 'skipped', 'failed'
+DONE_STATES = (INSERTED, NOT_FOUND, SKIPPED, FAILED)
+
+_MIGRATIONS = [
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        playlist_id TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        created REAL,
+        updated REAL
+    );
+    CREATE TABLE IF NOT EXISTS job_tracks (
+        job_id TEXT NOT NULL,
+        track_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        artist TEXT,
+        name TEXT,
+        duration_ms INTEGER,
+        youtube_id TEXT,
+        error TEXT,
+        PRIMARY KEY (job_id, track_id)
+    );
+    CREATE INDEX IF NOT EXISTS job_tracks_state ON job_tracks (job_id, state, position);
+    CREATE TABLE IF NOT EXISTS job_existing (
+        job_id TEXT NOT NULL,
+        youtube_id TEXT NOT NULL,
+        PRIMARY KEY (job_id, youtube_id)
+    )
+    ''',
+]
+
+
+class TransferJournal:
+    """Persists per-track transfer state so interrupted runs resume from the last checkpoint."""
+
+    def __init__(self, db_path='transfer_journal.db'):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = connect(db_path)
+        with self._lock:
+            apply_migrations(self._conn, _MIGRATIONS)
+
+    def find_unfinished(self, source: str, playlist_id: str) -> Optional[str]:
+        """Returns the most recent interrupted job for this source/target pair, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE source = ? AND playlist_id = ? AND status = 'running' "
+                "ORDER BY created DESC LIMIT 1", (source, playlist_id)).fetchone()
+        return row[0] if row else None
+
+    def start_job(self, source: str, playlist_id: str, track_ids: List[str], existing_ids: Iterable[str]) -> str:
+        """Registers a new job with its full track list and the playlist contents seen at start."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            # A new job supersedes any interrupted one for the same pair; only running jobs keep their rows
+            self._conn.execute("UPDATE jobs SET status = 'abandoned', updated = ? "
+                               "WHERE source = ? AND playlist_id = ? AND status = 'running'",
+                               (now, source, playlist_id))
+            self._prune("SELECT job_id FROM jobs WHERE source = ? AND playlist_id = ? AND status != 'running'",
+                        (source, playlist_id))
+            self._conn.execute('INSERT INTO jobs (job_id, source, playlist_id, created, updated) VALUES (?, ?, ?, ?, ?)',
+                               (job_id, source, playlist_id, now, now))
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO job_tracks (job_id, track_id, position, state) VALUES (?, ?, ?, ?)',
+                ((job_id, tid, pos, LISTED) for pos, tid in enumerate(track_ids)))
+            self._conn.executemany('INSERT OR IGNORE INTO job_existing (job_id, youtube_id) VALUES (?, ?)',
+                                   ((job_id, v) for v in existing_ids))
+        return job_id
+
+    def mark_exported(self, job_id: str, tracks: Iterable[Track]):
+        """Stores fetched metadata so a resumed job never asks Yandex for it again."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE job_tracks SET state = ?, artist = ?, name = ?, duration_ms = ? '
+                'WHERE job_id = ? AND track_id = ? AND state = ?',
+                ((EXPORTED, t.artist, t.name, t.duration_ms, job_id, t.track_id, LISTED) for t in tracks))
+
+    def mark(self, job_id: str, updates: Iterable[Tuple[str, str, Optional[str], Optional[str]]]):
+        """Applies (track_id, state, youtube_id, error) updates in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE job_tracks SET state = ?, youtube_id = COALESCE(?, youtube_id), error = ? '
+                'WHERE job_id = ? AND track_id = ?',
+                ((state, youtube_id, error, job_id, tid) for tid, state, youtube_id, error in updates))
+            self._conn.execute('UPDATE jobs SET updated = ? WHERE job_id = ?', (time.time(), job_id))
+
+    def pending(self, job_id: str) -> Tuple[List[Track], List[str]]:
+        """Returns (tracks with metadata still to transfer, IDs still to export), both in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT track_id, state, artist, name, duration_ms FROM job_tracks "
+                f"WHERE job_id = ? AND state NOT IN ({','.join('?' * len(DONE_STATES))}) ORDER BY position",
+                (job_id, *DONE_STATES)).fetchall()
+        tracks = [Track(artist, name, duration or 0, tid) for tid, state, artist, name, duration in rows
+                  if state != LISTED]
+        unexported = [tid for tid, state, *_ in rows if state == LISTED]
+        return tracks, unexported
+
+    def known_ids(self, job_id: str) -> Set[str]:
+        """Video IDs already in the playlist: the snapshot at job start plus everything inserted since."""
+        with self._lock:
+            existing = {r[0] for r in self._conn.execute(
+                'SELECT youtube_id FROM job_existing WHERE job_id = ?', (job_id,))}
+            existing.update(r[0] for r in self._conn.execute(
+                'SELECT youtube_id FROM job_tracks WHERE job_id = ? AND state = ? AND youtube_id IS NOT NULL',
+                (job_id, INSERTED)))
+        return existing
+
+    def queued(self, job_id: str) -> List[Tuple[str, str]]:
+        """(track_id, youtube_id) of tracks sent to the playlist without a journaled outcome."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT track_id, youtube_id FROM job_tracks WHERE job_id = ? AND state = ? ORDER BY position',
+                (job_id, QUEUED)).fetchall()
+
+    def completed(self, job_id: str) -> List[Tuple[str, str, Optional[str]]]:
+        """Returns (track_id, state, youtube_id) for tracks that were inserted or already present."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT track_id, state, youtube_id FROM job_tracks WHERE job_id = ? AND state IN (?, ?)',
+                (job_id, INSERTED, SKIPPED)).fetchall()
+
+    def summary(self, job_id: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT state, COUNT(*) FROM job_tracks WHERE job_id = ? GROUP BY state', (job_id,)))
+
+    def finish_job(self, job_id: str):
+        """Marks the job done and drops its per-track rows; read completed() before calling this."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = 'done', updated = ? WHERE job_id = ?", (time.time(), job_id))
+            self._prune('SELECT ?', (job_id,))
+
+    def _prune(self, jobs_query: str, params: tuple):
+        # Per-track rows and the playlist snapshot are only needed to resume; the jobs row stays as history
+        for table in ('job_tracks', 'job_existing'):
+            self._conn.execute(f'DELETE FROM {table} WHERE job_id IN ({jobs_query})', params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
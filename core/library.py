@@ -0,0 +1,82 @@
+from typing import Callable, Dict, List, Optional
+from .mirror import PlaylistMirror
+from .state import SyncState
+from .yandex import SourceCollection
+
+
+class LibraryIndex:
+    """Deduplicated view over many collections: every unique track appears once, in first-seen order."""
+
+    def __init__(self, collections: List[SourceCollection]):
+        self.collections = collections
+        self.unique_ids = list(dict.fromkeys(tid for c in collections for tid in c.track_ids))
+
+    @property
+    def total_entries(self) -> int:
+        return sum(len(c.track_ids) for c in self.collections)
+
+
+def run_library_transfer(exporter, importer, state: SyncState, dry_run: bool = False,
+                         title_suffix: str = " (Yandex)",
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Mirrors liked tracks, playlists and liked albums, resolving each unique track on YouTube once.
+
+    Every collection gets its own YouTube playlist, created on first run and reused afterwards.
+    """
+    source = exporter.account_id
+    print("📚 Listing Yandex playlists and albums...")
+    index = LibraryIndex(exporter.list_collections())
+    print(f"📚 {len(index.collections)} collections, {index.total_entries} entries, "
+          f"{len(index.unique_ids)} unique tracks")
+
+    # Resolve every unique track exactly once; collections below only look the result up
+    resolved: Dict[str, Optional[str]] = {}
+    searches_before = importer.counters['searches']
+    for chunk in exporter.iter_tracks(index.unique_ids):
+        for track, v_id in zip(chunk, importer.resolve_tracks(chunk)):
+            resolved[track.track_id] = v_id
+        if progress_callback:
+            progress_callback(len(resolved), len(index.unique_ids))
+
+    mirror = PlaylistMirror(importer.ytmusic, state)
+    results = []
+    for collection in index.collections:
+        stats = {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+        playlist_id = state.target_for(source, collection.key)
+        if playlist_id:
+            existing = mirror.existing_ids(playlist_id)
+        else:
+            existing = set()
+            if not dry_run:
+                playlist_id = importer.ytmusic.create_playlist(f"{collection.title}{title_suffix}", "Automated Import")
+                state.set_target(source, collection.key, playlist_id)
+                state.replace_snapshot(playlist_id, [], 0)
+
+        to_add = []
+        for tid in collection.track_ids:
+            v_id = resolved.get(tid)
+            if not v_id:
+                stats['not_found'] += 1
+            elif v_id in existing:
+                stats['skipped'] += 1
+            else:
+                existing.add(v_id)
+                to_add.append(v_id)
+
+        print(f"🎵 {collection.title}: {len(to_add)} to add")
+        if dry_run:
+            stats['added'] = len(to_add)
+        elif to_add:
+            added = importer.insert_batch(playlist_id, to_add, stats)
+            state.add_to_snapshot(playlist_id, added)
+        results.append({'key': collection.key, 'title': collection.title, 'playlist_id': playlist_id,
+                        'stats': stats})
+
+    totals = {k: sum(r['stats'][k] for r in results) for k in ('added', 'skipped', 'not_found', 'failed')}
+    return {
+        'collections': results,
+        'entries': index.total_entries,
+        'unique_tracks': len(index.unique_ids),
+        'searches': importer.counters['searches'] - searches_before,
+        'stats': totals,
+    }
@@ -0,0 +1,126 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+from rapidfuzz import fuzz
+from .track import Track, ARTIST_SEPARATOR
+
+try:
+    # cpdist needs numpy; without it scoring falls back to a plain loop over the same scorer
+    import numpy  # noqa: F401
+    from rapidfuzz.process import cpdist
+except ImportError:
+    cpdist = None
+
+# Bump when the scoring formula changes so cached candidate scores get recomputed
+SCORER_VERSION = 3
+
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'і': 'i', 'ї': 'yi', 'є': 'ye',
+})
+
+_BRACKETS = re.compile(r'[(\[{][^)\]}]*[)\]}]')
+_FEAT = re.compile(r'\s(?:feat|ft|featuring|prod)\.?\s.*$')
+_SUFFIX = re.compile(r'\s-\s.*\b(?:remaster(?:ed)?|version|edit|mix|live|mono|stereo)\b.*$')
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercases, transliterates Cyrillic and strips decorations like 'feat.' or '(Remastered)'."""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = _BRACKETS.sub(' ', text)
+    text = _SUFFIX.sub('', text)
+    text = _FEAT.sub('', text)
+    text = text.translate(_TRANSLIT)
+    # Drop accents left after transliteration (é -> e)
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def _duration_penalty(source_ms: int, candidate_ms: Optional[int]) -> float:
+    """0 within a few seconds of the source length, growing to 30 points for a 30s+ mismatch."""
+    if not source_ms or not candidate_ms:
+        return 0.0
+    diff = abs(source_ms - candidate_ms) / 1000
+    return min(30.0, max(0.0, diff - 3))
+
+
+class Matcher:
+    """Scores search candidates against source tracks using precomputed normalized keys."""
+
+    def __init__(self):
+        self._keys: Dict[Track, str] = {}
+        self._main_keys: Dict[Track, str] = {}
+
+    def key(self, track: Track) -> str:
+        """Normalized artists and title; every credited artist is part of it."""
+        cached = self._keys.get(track)
+        if cached is None:
+            cached = self._keys[track] = f"{normalize(track.artist)} {normalize(track.name)}"
+        return cached
+
+    def main_key(self, track: Track) -> str:
+        """Like key() with only the first artist, for results that credit just the main one."""
+        cached = self._main_keys.get(track)
+        if cached is None:
+            main = track.artist.split(ARTIST_SEPARATOR, 1)[0]
+            cached = self._main_keys[track] = f"{normalize(main)} {normalize(track.name)}"
+        return cached
+
+    def prepare(self, tracks: Sequence[Track]):
+        """Precomputes normalized keys for a whole library in one pass."""
+        for track in tracks:
+            self.key(track)
+            self.main_key(track)
+
+    @staticmethod
+    def candidate(res: dict) -> dict:
+        """Converts a ytmusicapi search result into the compact form stored in the cache."""
+        seconds = res.get('duration_seconds')
+        return {
+            'videoId': res['videoId'],
+            'title': res.get('title') or '',
+            'artists': [a['name'] for a in res.get('artists') or [] if a.get('name')],
+            'duration_ms': seconds * 1000 if seconds else None,
+        }
+
+    @staticmethod
+    def candidate_from_cache(c: dict) -> dict:
+        """Upgrades candidates stored by older versions (single 'artist', no duration)."""
+        artists = c.get('artists') or ([c['artist']] if c.get('artist') else [])
+        return {'videoId': c['videoId'], 'title': c.get('title') or '', 'artists': artists,
+                'duration_ms': c.get('duration_ms')}
+
+    def score_batch(self, pairs: Sequence[Tuple[Track, dict]]) -> List[float]:
+        """Scores (track, candidate) pairs in one vectorized pass where possible."""
+        if not pairs:
+            return []
+        sources = [self.key(t) for t, _ in pairs]
+        main_sources = [self.main_key(t) for t, _ in pairs]
+        first_artist, all_artists = [], []
+        for _, c in pairs:
+            title = normalize(c['title'])
+            artists = [normalize(a) for a in c['artists']] or ['']
+            first_artist.append(f"{artists[0]} {title}")
+            all_artists.append(f"{' '.join(artists)} {title}")
+
+        if cpdist is not None:
+            first = cpdist(sources, first_artist, scorer=fuzz.token_sort_ratio, workers=-1).tolist()
+            joined = cpdist(sources, all_artists, scorer=fuzz.token_sort_ratio, workers=-1).tolist()
+            main = cpdist(main_sources, first_artist, scorer=fuzz.token_sort_ratio, workers=-1).tolist()
+        else:
+            first = [fuzz.token_sort_ratio(s, c) for s, c in zip(sources, first_artist)]
+            joined = [fuzz.token_sort_ratio(s, c) for s, c in zip(sources, all_artists)]
+            main = [fuzz.token_sort_ratio(s, c) for s, c in zip(main_sources, first_artist)]
+
+        return [
+            round(max(0.0, max(a, b, m) - _duration_penalty(t.duration_ms, c.get('duration_ms'))), 1)
+            for (t, c), a, b, m in zip(pairs, first, joined, main)
+        ]
+
+    def score(self, track: Track, candidates: Sequence[dict]) -> List[dict]:
+        """Returns copies of the candidates annotated with score and scorer version."""
+        scores = self.score_batch([(track, c) for c in candidates])
+        return [dict(c, score=s, scorer=SCORER_VERSION) for c, s in zip(candidates, scores)]
@@ -0,0 +1,185 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Upper bounds (seconds) of latency histogram buckets; the last bucket is +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, n in zip(BUCKETS + (float('inf'),), self.counts):
+            cumulative += n
+            buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6),
+                'mean': round(self.sum / self.count, 6) if self.count else 0.0, 'buckets': buckets}
+
+
+class Metrics:
+    """Thread-safe registry of counters, latency histograms, per-phase wall times and milestones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+        self.profile_dir: Optional[str] = None
+        # One cProfile.Profile per (name, thread): a profiler only sees the thread that enabled it
+        self._profilers: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self._local = threading.local()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[str, float] = {}
+            self.histograms: Dict[str, Histogram] = {}
+            self.phases: Dict[str, float] = {}
+            self.milestones: Dict[str, float] = {}
+            self.started = time.time()
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def mark(self, name: str):
+        """Records when a milestone was first reached, in seconds since the registry was (re)started."""
+        if name in self.milestones:
+            return
+        with self._lock:
+            self.milestones.setdefault(name, round(time.time() - self.started, 3))
+
+    @contextmanager
+    def timer(self, name: str):
+        """Counts a call and records its latency; failures are counted under '<name>.errors'."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Accumulates wall time spent in a phase (phases may overlap across threads)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def enable_profiling(self, directory: str):
+        """Opt-in: profiles blocks marked with profile() in every thread; dump_profiles() writes them here."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.profile_dir = directory
+            self._profilers = {}
+
+    @contextmanager
+    def profile(self, name: str):
+        """Accumulates cProfile data for the block in the calling thread; nested blocks count toward the outer one."""
+        if not self.profile_dir or getattr(self._local, 'active', False):
+            yield
+            return
+        with self._lock:
+            profiler = self._profilers.setdefault((name, threading.get_ident()), cProfile.Profile())
+        self._local.active = True
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._local.active = False
+
+    def dump_profiles(self):
+        """Merges each name's per-thread profiles into <profile_dir>/<name>.prof (call once the threads are idle)."""
+        if not self.profile_dir:
+            return
+        by_name: Dict[str, list] = {}
+        with self._lock:
+            for (name, _), profiler in self._profilers.items():
+                by_name.setdefault(name, []).append(profiler)
+        for name, profilers in by_name.items():
+            stats = pstats.Stats(profilers[0])
+            for profiler in profilers[1:]:
+                stats.add(profiler)
+            stats.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+    def ratio(self, hits: str, misses: str) -> float:
+        h, m = self.counters.get(hits, 0), self.counters.get(misses, 0)
+        return round(h / (h + m), 4) if h + m else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                'elapsed_s': round(time.time() - self.started, 3),
+                'phases_s': {k: round(v, 3) for k, v in sorted(self.phases.items())},
+                'milestones_s': dict(sorted(self.milestones.items(), key=lambda kv: kv[1])),
+                'counters': dict(sorted(self.counters.items())),
+                'latency_s': {k: h.to_dict() for k, h in sorted(self.histograms.items())},
+            }
+        report['cache_hit_ratio'] = self.ratio('cache.hits', 'cache.misses')
+        return report
+
+    def write_json(self, path: str, extra: Optional[dict] = None):
+        report = self.snapshot()
+        if extra:
+            report.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    def write_prometheus(self, path: str, prefix: str = 'y2y'):
+        """Writes the registry in Prometheus text exposition format (for node_exporter's textfile collector)."""
+        def metric(name):
+            return f"{prefix}_{name.replace('.', '_').replace('-', '_')}"
+
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE {metric(name)}_total counter", f"{metric(name)}_total {value}"]
+            for name, seconds in sorted(self.phases.items()):
+                lines += [f"# TYPE {metric(name)}_phase_seconds gauge", f"{metric(name)}_phase_seconds {seconds:.6f}"]
+            for name, seconds in sorted(self.milestones.items()):
+                lines += [f"# TYPE {metric(name)}_milestone_seconds gauge",
+                          f"{metric(name)}_milestone_seconds {seconds:.3f}"]
+            for name, h in sorted(self.histograms.items()):
+                m = f"{metric(name)}_seconds"
+                lines.append(f"# TYPE {m} histogram")
+                for bound, cumulative in h.to_dict()['buckets'].items():
+                    lines.append(f'{m}_bucket{{le="{bound}"}} {cumulative}')
+                lines += [f"{m}_sum {h.sum:.6f}", f"{m}_count {h.count}"]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+# Process-wide registry used by all components
+METRICS = Metrics()
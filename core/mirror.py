@@ -0,0 +1,49 @@
+from typing import Set
+from .state import SyncState
+from .metrics import METRICS
+
+
+class PlaylistMirror:
+    """Keeps target playlists mirrored locally, reloading them only when a cheap check says they changed."""
+
+    def __init__(self, ytmusic, state: SyncState, page_size: int = 100, retries: int = 2):
+        self.ytmusic = ytmusic
+        self.state = state
+        # One get_playlist call of this size returns the item count and the first page
+        self.page_size = page_size
+        self.retries = retries
+
+    def _fetch(self, playlist_id: str, limit):
+        error = None
+        for _ in range(self.retries + 1):
+            try:
+                with METRICS.timer('ytmusic.get_playlist'):
+                    return self.ytmusic.get_playlist(playlist_id, limit=limit)
+            except Exception as e:
+                METRICS.inc('ytmusic.get_playlist.retries')
+                error = e
+        # Never fall back to an empty set: that would re-add the whole library as duplicates
+        raise RuntimeError(f"Could not read playlist {playlist_id}: {error}") from error
+
+    @staticmethod
+    def _ids(playlist_data) -> list:
+        return [item['videoId'] for item in playlist_data.get('tracks') or [] if item.get('videoId')]
+
+    def existing_ids(self, playlist_id: str) -> Set[str]:
+        """Returns the playlist's video IDs as a set, from the mirror when it is still current."""
+        snapshot = self.state.snapshot(playlist_id)
+        meta = self.state.snapshot_meta(playlist_id)
+        if snapshot is not None and meta is not None:
+            first_page = self._fetch(playlist_id, self.page_size)
+            count, head = first_page.get('trackCount'), self._ids(first_page)
+            if count is not None and count == meta[0] and set(head) <= snapshot:
+                self.state.update_head(playlist_id, count, head)
+                print(f"🪞 Playlist mirror is current ({len(snapshot)} items)")
+                return snapshot
+
+        print("🛰️ Analyzing existing YouTube playlist...")
+        playlist_data = self._fetch(playlist_id, None)
+        ids = self._ids(playlist_data)
+        count = playlist_data.get('trackCount')
+        self.state.replace_snapshot(playlist_id, ids, len(ids) if count is None else count, ids[:self.page_size])
+        return set(ids)
@@ -0,0 +1,247 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+from .journal import TransferJournal, MATCHED, NOT_FOUND, SKIPPED, QUEUED, INSERTED, FAILED
+from .state import SyncState
+from .mirror import PlaylistMirror
+from .metrics import METRICS
+from .track import Track
+
+_DONE = object()
+
+
+class TransferPipeline:
+    """Streams export -> search -> insert through bounded queues so network waits overlap."""
+
+    def __init__(self, importer, buffer_size: int = 4, slice_size: int = 50,
+                 journal: Optional[TransferJournal] = None, job_id: Optional[str] = None, dry_run: bool = False):
+        self.importer = importer
+        # Max chunks held between stages; keeps memory flat regardless of library size
+        self.buffer_size = buffer_size
+        # Export chunks are searched in small slices so inserts can start early
+        self.slice_size = slice_size
+        # Optional checkpointing; every stage records per-track state as it commits work
+        self.journal = journal
+        self.job_id = job_id
+        # Resolve everything but count inserts instead of performing them
+        self.dry_run = dry_run
+        # (track_id, state, youtube_id) of tracks that ended up in the playlist during the last run
+        self.completed = []
+
+    def _checkpoint(self, updates):
+        self.completed.extend((tid, state, v_id) for tid, state, v_id, _ in updates if state in (INSERTED, SKIPPED))
+        if self.journal and updates:
+            self.journal.mark(self.job_id, updates)
+
+    def run(self, chunks: Iterable[List[Track]], playlist_id: str, total: Optional[int] = None,
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+            existing: Optional[Set[str]] = None) -> dict:
+        """Runs all stages concurrently and returns the usual sync stats."""
+        stats = {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+        self.completed = []
+        search_q = queue.Queue(maxsize=self.buffer_size)
+        insert_q = queue.Queue(maxsize=self.buffer_size * self.importer.inserter.max_batch)
+        stop = threading.Event()
+        errors = []
+        started = time.monotonic()
+
+        def guarded(stage, out_q):
+            def wrapper():
+                try:
+                    name = stage.__name__.replace('_stage', '')
+                    with METRICS.phase(f'pipeline.{name}'), METRICS.profile(f'pipeline.{name}'):
+                        stage()
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                finally:
+                    if out_q is not None:
+                        _put(out_q, _DONE, stop, force=True)
+            return wrapper
+
+        def export_stage():
+            for chunk in chunks:
+                if self.journal:
+                    self.journal.mark_exported(self.job_id, chunk)
+                if stop.is_set() or not _put(search_q, chunk, stop):
+                    return
+
+        if existing is None:
+            print("🛰️ Analyzing existing YouTube playlist...")
+            existing = self.importer.load_existing_ids(playlist_id)
+
+        def search_stage():
+            done = 0
+            before = dict(self.importer.counters)
+            try:
+                while not stop.is_set():
+                    chunk = search_q.get()
+                    if chunk is _DONE:
+                        return
+                    for i in range(0, len(chunk), self.slice_size):
+                        part = chunk[i:i + self.slice_size]
+                        updates, queued = [], []
+                        for track, v_id in zip(part, self.importer.resolve_tracks(part, quiet=True)):
+                            if not v_id:
+                                stats['not_found'] += 1
+                                updates.append((track.track_id, NOT_FOUND, None, None))
+                            elif v_id in existing:
+                                stats['skipped'] += 1
+                                updates.append((track.track_id, SKIPPED, v_id, None))
+                            else:
+                                existing.add(v_id)
+                                updates.append((track.track_id, MATCHED, v_id, None))
+                                queued.append((track.track_id, v_id))
+                        self._checkpoint(updates)
+                        for item in queued:
+                            if not _put(insert_q, item, stop):
+                                return
+                        done += len(part)
+                        if progress_callback:
+                            progress_callback(done, total or done)
+            finally:
+                # Slices resolve quietly; the cache is flushed and the totals printed once per run
+                self.importer.cache.flush()
+                counts = {k: self.importer.counters[k] - before[k]
+                          for k in ('cache_hits', 'known_misses', 'searches')}
+                print(f"💾 {counts['cache_hits'] - counts['known_misses']} tracks resolved from cache, "
+                      f"{counts['known_misses']} known misses, {counts['searches']} searched")
+
+        def insert_stage():
+            batch = []
+            first_logged = False
+            while True:
+                item = insert_q.get()
+                if item is not _DONE:
+                    batch.append(item)
+                if batch and (item is _DONE or len(batch) >= self.importer.inserter.batch_size):
+                    if stop.is_set():
+                        return
+                    if self.dry_run:
+                        stats['added'] += len(batch)
+                        batch = []
+                        continue
+                    track_ids = {v: tid for tid, v in batch}
+                    self._checkpoint([(tid, QUEUED, v, None) for tid, v in batch])
+                    # Each confirmed call is journaled right away; only the unconfirmed rest can stay queued
+                    added = set(self.importer.insert_batch(
+                        playlist_id, [v for _, v in batch], stats,
+                        on_added=lambda ids: self._checkpoint([(track_ids[v], INSERTED, v, None) for v in ids])))
+                    self._checkpoint([(tid, FAILED, v, None) for tid, v in batch if v not in added])
+                    batch = []
+                    if not first_logged and stats['added']:
+                        first_logged = True
+                        print(f"⏱️ First tracks added after {time.monotonic() - started:.1f}s")
+                if item is _DONE:
+                    return
+
+        threads = [
+            threading.Thread(target=guarded(export_stage, search_q), daemon=True),
+            threading.Thread(target=guarded(search_stage, insert_q), daemon=True),
+            threading.Thread(target=guarded(insert_stage, None), daemon=True),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        METRICS.dump_profiles()
+        if errors:
+            raise errors[0]
+        return stats
+
+
+def _resume_chunks(exporter, ready: List[Track], unexported: List[str], batch_size: int = 1000) -> Iterator[List[Track]]:
+    """Replays journaled metadata first, then fetches only the tracks never exported."""
+    for i in range(0, len(ready), batch_size):
+        yield ready[i:i + batch_size]
+    yield from exporter.iter_tracks(unexported, batch_size=batch_size)
+
+
+def run_liked_transfer(exporter, importer, playlist_id: str, journal: Optional[TransferJournal] = None,
+                       resume: bool = True, state: Optional[SyncState] = None, incremental: bool = False,
+                       dry_run: bool = False, progress_callback: Optional[Callable[[int, int], None]] = None) -> Optional[dict]:
+    """Transfers the exporter's liked tracks into playlist_id.
+
+    With a journal the run is checkpointed and an interrupted job is resumed. With a SyncState
+    the synced likes are remembered and the target playlist is read through a local mirror;
+    incremental=True then processes only likes that were not synced before. dry_run=True
+    resolves matches without touching the playlist, journal or watermarks.
+    Returns None when the source has no tracks.
+    """
+    source = exporter.source_id
+    job_id = journal.find_unfinished(source, playlist_id) if journal and resume and not dry_run else None
+    newest_like = None
+
+    if job_id:
+        existing = journal.known_ids(job_id)
+        queued = journal.queued(job_id)
+        if queued:
+            # Sent right before the interruption: only the playlist itself knows whether they went in
+            print(f"🛰️ Checking {len(queued)} tracks that were being added when the run stopped...")
+            present = importer.load_existing_ids(playlist_id)
+            journal.mark(job_id, [(tid, INSERTED, v, None) for tid, v in queued if v in present])
+            existing |= present
+        ready, unexported = journal.pending(job_id)
+        print(f"♻️ Resuming interrupted transfer: {len(ready) + len(unexported)} tracks left")
+        chunks = _resume_chunks(exporter, ready, unexported)
+        total = len(ready) + len(unexported)
+    else:
+        entries = exporter.liked_entries()
+        if not entries:
+            return None
+        newest_like = entries[0][1]
+        if incremental and state:
+            last_like, synced = state.watermark(source, playlist_id)
+            entries = [(tid, ts) for tid, ts in entries if tid not in synced]
+            print(f"🔁 Incremental sync: {len(entries)} new likes (watermark: {last_like or 'none'})")
+            if not entries:
+                print("✅ Already up to date.")
+                return {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+
+        # Reverse to maintain original "last liked" order
+        track_ids = [tid for tid, _ in reversed(entries)]
+        total = len(track_ids)
+        if playlist_id is None:
+            # Dry run into a playlist that does not exist yet
+            existing = set()
+        elif state:
+            existing = PlaylistMirror(importer.ytmusic, state).existing_ids(playlist_id)
+        else:
+            print("🛰️ Analyzing existing YouTube playlist...")
+            existing = importer.load_existing_ids(playlist_id)
+        if journal and not dry_run:
+            job_id = journal.start_job(source, playlist_id, track_ids, existing)
+        chunks = exporter.iter_tracks(track_ids)
+
+    print(f"🚚 Transferring {total} tracks...")
+    pipeline = TransferPipeline(importer, journal=journal if job_id else None, job_id=job_id, dry_run=dry_run)
+    stats = pipeline.run(chunks, playlist_id, total=total, progress_callback=progress_callback, existing=existing)
+    if dry_run:
+        return stats
+    completed = journal.completed(job_id) if job_id else pipeline.completed
+    if job_id:
+        journal.finish_job(job_id)
+    if state:
+        # Misses and failures stay unsynced so the next incremental run retries them
+        state.advance(source, playlist_id, [tid for tid, _, _ in completed], newest_like)
+        state.add_to_snapshot(playlist_id, [v for _, st, v in completed if st == INSERTED])
+    return stats
+
+
+def _put(q: queue.Queue, item, stop: threading.Event, force: bool = False) -> bool:
+    """Blocking put that gives up once the pipeline is stopping (unless forced)."""
+    while True:
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            if stop.is_set() and not force:
+                return False
+            if stop.is_set():
+                # Drain one slot so the downstream stage can observe the sentinel
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
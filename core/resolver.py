@@ -0,0 +1,144 @@
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+from .track import Track
+from .matching import Matcher, normalize
+from .metrics import METRICS
+
+# Query builders a tier can use, by name
+QUERIES: Dict[str, Callable[[Track], str]] = {
+    'plain': lambda t: f"{t.artist} - {t.name}",
+    # Transliterated, with brackets / feat. / remaster suffixes stripped
+    'translit': lambda t: f"{normalize(t.artist)} {normalize(t.name)}",
+}
+
+_WORDS = re.compile(r'\w+')
+
+
+def _query_key(query: str) -> str:
+    # Punctuation-insensitive but script-sensitive, so a transliterated query still counts as new
+    return ' '.join(_WORDS.findall(query.lower()))
+
+
+@dataclass(frozen=True)
+class SearchTier:
+    """One search attempt: a ytmusicapi filter, a result limit and a query builder."""
+    filter: Optional[str]
+    limit: int
+    query: str = 'plain'
+
+    @property
+    def name(self) -> str:
+        return f"{self.filter or 'all'}:{self.limit}:{self.query}"
+
+
+# Cheap and precise first; wider and fuzzier only for tracks the earlier tiers left ambiguous
+DEFAULT_TIERS = (
+    SearchTier('songs', 3),
+    SearchTier('songs', 10),
+    SearchTier('songs', 5, 'translit'),
+    SearchTier('videos', 5),
+)
+
+
+def parse_tiers(spec: str) -> List[SearchTier]:
+    """Parses "filter:limit[:query],..." (e.g. "songs:3,videos:5:translit"); filter "all" means none."""
+    tiers = []
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        bits = part.split(':')
+        if len(bits) not in (2, 3) or not bits[1].isdigit():
+            raise ValueError(f"Invalid search tier '{part}', expected filter:limit[:query]")
+        query = bits[2] if len(bits) == 3 else 'plain'
+        if query not in QUERIES:
+            raise ValueError(f"Unknown tier query '{query}', expected one of {', '.join(QUERIES)}")
+        tiers.append(SearchTier(None if bits[0] == 'all' else bits[0], int(bits[1]), query))
+    if not tiers:
+        raise ValueError("At least one search tier is required")
+    return tiers
+
+
+@dataclass
+class Resolution:
+    """Outcome of a tiered search: the best candidate over all tiers tried."""
+    best: Optional[dict]
+    query: str
+    candidates: List[dict] = field(default_factory=list)
+    tier: Optional[str] = None
+    early_exit: bool = False
+
+
+class TieredResolver:
+    """Runs search tiers in order and stops at the first confident, duration-matched hit."""
+
+    def __init__(self, search: Callable[[str, Optional[str], int], List[dict]], matcher: Matcher,
+                 tiers: Sequence[SearchTier] = DEFAULT_TIERS, confident_score: float = 90.0,
+                 duration_tolerance_ms: int = 5000, keep_candidates: int = 10):
+        self.search = search
+        self.matcher = matcher
+        self.tiers = list(tiers)
+        self.confident_score = confident_score
+        self.duration_tolerance_ms = duration_tolerance_ms
+        self.keep_candidates = keep_candidates
+        # API calls per tier, and how many tracks each tier settled early
+        self.calls: Counter = Counter()
+        self.exits: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _confident(self, track: Track, c: dict) -> bool:
+        if c['score'] < self.confident_score:
+            return False
+        if not track.duration_ms:
+            return True
+        return c.get('duration_ms') is not None and \
+            abs(c['duration_ms'] - track.duration_ms) <= self.duration_tolerance_ms
+
+    def _count(self, counter: Counter, tier: SearchTier, kind: str):
+        with self._lock:
+            counter[tier.name] += 1
+        # Colons are reserved for recording rules in Prometheus metric names
+        METRICS.inc(f"search.tier.{tier.name.replace(':', '_')}.{kind}")
+
+    def resolve(self, track: Track) -> Resolution:
+        """Searches tier by tier; exceptions from the search callable propagate to the caller."""
+        merged: Dict[str, dict] = {}
+        # (filter, query words) -> (limit, results returned) for tiers already run
+        tried: Dict[tuple, tuple] = {}
+        first_query = None
+        for tier in self.tiers:
+            query = QUERIES[tier.query](track)
+            first_query = first_query or query
+            seen = tried.get((tier.filter, _query_key(query)))
+            # A wider limit on the same query is pointless if the last call already came back short
+            if seen and (seen[0] >= tier.limit or seen[1] < seen[0]):
+                continue
+
+            results = self.search(query, tier.filter, tier.limit) or []
+            self._count(self.calls, tier, 'calls')
+            tried[(tier.filter, _query_key(query))] = (tier.limit, len(results))
+            with METRICS.timer('matching.score'):
+                scored = self.matcher.score(track, [Matcher.candidate(r) for r in results if r.get('videoId')])
+            for c in scored:
+                if c['videoId'] not in merged or merged[c['videoId']]['score'] < c['score']:
+                    merged[c['videoId']] = dict(c, query=query)
+
+            best = max(scored, key=lambda c: c['score'], default=None)
+            if best and self._confident(track, best):
+                self._count(self.exits, tier, 'exits')
+                return self._result(merged, first_query, tier, early_exit=True)
+        return self._result(merged, first_query, None, early_exit=False)
+
+    def _result(self, merged: Dict[str, dict], first_query: str, tier: Optional[SearchTier],
+                early_exit: bool) -> Resolution:
+        ranked = sorted(merged.values(), key=lambda c: -c['score'])[:self.keep_candidates]
+        best = ranked[0] if ranked else None
+        query = best.pop('query') if best else first_query
+        for c in ranked[1:]:
+            c.pop('query', None)
+        return Resolution(best, query, ranked, tier.name if tier else None, early_exit)
+
+    def report(self) -> Dict[str, dict]:
+        """API calls and early exits per tier, in tier order."""
+        with self._lock:
+            return {t.name: {'calls': self.calls[t.name], 'exits': self.exits[t.name]} for t in self.tiers}
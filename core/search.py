@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
+from .track import Track
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by workers to cap the API request rate."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        # rate <= 0 disables limiting entirely
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocks until the requested amount of tokens is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SearchEngine:
+    """Runs track lookups on a worker pool while keeping results in source order."""
+
+    def __init__(self, search_func: Callable[[Track], Optional[str]], workers: int = 4):
+        self.search_func = search_func
+        self.workers = max(1, workers)
+
+    def search_all(self, tracks: List[Track],
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Optional[str]]:
+        """Resolves every track and returns video IDs aligned with the input list."""
+        total = len(tracks)
+        results: List[Optional[str]] = [None] * total
+        if not tracks:
+            return results
+
+        if self.workers == 1:
+            for i, track in enumerate(tracks):
+                results[i] = self.search_func(track)
+                if progress_callback:
+                    progress_callback(i + 1, total)
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.search_func, track): i for i, track in enumerate(tracks)}
+            # Progress is reported from the calling thread, never from the workers
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(done, total)
+        return results
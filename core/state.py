@@ -0,0 +1,174 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .db import apply_migrations, connect
+
+_MIGRATIONS = [
+    '''
+    CREATE TABLE IF NOT EXISTS sync_watermarks (
+        source TEXT NOT NULL,
+        playlist_id TEXT NOT NULL,
+        last_like_ts TEXT,
+        updated REAL,
+        PRIMARY KEY (source, playlist_id)
+    );
+    CREATE TABLE IF NOT EXISTS synced_tracks (
+        source TEXT NOT NULL,
+        playlist_id TEXT NOT NULL,
+        track_id TEXT NOT NULL,
+        PRIMARY KEY (source, playlist_id, track_id)
+    );
+    CREATE TABLE IF NOT EXISTS playlist_snapshots (
+        playlist_id TEXT PRIMARY KEY,
+        updated REAL
+    );
+    CREATE TABLE IF NOT EXISTS playlist_items (
+        playlist_id TEXT NOT NULL,
+        youtube_id TEXT NOT NULL,
+        PRIMARY KEY (playlist_id, youtube_id)
+    )
+    ''',
+    # v2: cheap staleness checks (item count + first page) and items this tool inserted itself
+    '''
+    ALTER TABLE playlist_snapshots ADD COLUMN track_count INTEGER;
+    ALTER TABLE playlist_snapshots ADD COLUMN head TEXT;
+    ALTER TABLE playlist_items ADD COLUMN inserted_by_tool INTEGER NOT NULL DEFAULT 0
+    ''',
+    # v3: which YouTube playlist mirrors each source collection (Yandex playlist, album, ...)
+    '''
+    CREATE TABLE IF NOT EXISTS collection_targets (
+        source TEXT NOT NULL,
+        collection TEXT NOT NULL,
+        playlist_id TEXT NOT NULL,
+        PRIMARY KEY (source, collection)
+    )
+    ''',
+    # v4: last known library playlists, shown at startup before the account is reachable
+    '''
+    CREATE TABLE IF NOT EXISTS library_playlists (
+        position INTEGER PRIMARY KEY,
+        playlist_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        updated REAL
+    )
+    ''',
+]
+
+
+class SyncState:
+    """Remembers what was already synced per source/target pair and mirrors target playlists locally."""
+
+    def __init__(self, db_path='sync_state.db'):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = connect(db_path)
+        with self._lock:
+            apply_migrations(self._conn, _MIGRATIONS)
+
+    def watermark(self, source: str, playlist_id: str) -> Tuple[Optional[str], Set[str]]:
+        """Returns (newest like timestamp synced, IDs of all source tracks already synced)."""
+        with self._lock:
+            row = self._conn.execute('SELECT last_like_ts FROM sync_watermarks WHERE source = ? AND playlist_id = ?',
+                                     (source, playlist_id)).fetchone()
+            synced = {r[0] for r in self._conn.execute(
+                'SELECT track_id FROM synced_tracks WHERE source = ? AND playlist_id = ?', (source, playlist_id))}
+        return (row[0] if row else None), synced
+
+    def advance(self, source: str, playlist_id: str, track_ids: Iterable[str], last_like_ts: Optional[str]):
+        """Marks source tracks as synced and moves the like-timestamp watermark forward."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO synced_tracks (source, playlist_id, track_id) VALUES (?, ?, ?)',
+                ((source, playlist_id, tid) for tid in track_ids))
+            self._conn.execute(
+                'INSERT INTO sync_watermarks (source, playlist_id, last_like_ts, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (source, playlist_id) DO UPDATE SET '
+                'last_like_ts = MAX(COALESCE(last_like_ts, \'\'), COALESCE(excluded.last_like_ts, \'\')), '
+                'updated = excluded.updated',
+                (source, playlist_id, last_like_ts, time.time()))
+
+    def snapshot(self, playlist_id: str) -> Optional[Set[str]]:
+        """Returns the mirrored video IDs of a playlist, or None if it was never mirrored."""
+        with self._lock:
+            if not self._conn.execute('SELECT 1 FROM playlist_snapshots WHERE playlist_id = ?',
+                                      (playlist_id,)).fetchone():
+                return None
+            return {r[0] for r in self._conn.execute(
+                'SELECT youtube_id FROM playlist_items WHERE playlist_id = ?', (playlist_id,))}
+
+    def snapshot_meta(self, playlist_id: str) -> Optional[Tuple[Optional[int], List[str]]]:
+        """Returns (remote item count, first-page video IDs) recorded with the mirror."""
+        with self._lock:
+            row = self._conn.execute('SELECT track_count, head FROM playlist_snapshots WHERE playlist_id = ?',
+                                     (playlist_id,)).fetchone()
+        if not row:
+            return None
+        return row[0], json.loads(row[1]) if row[1] else []
+
+    def tool_inserted(self, playlist_id: str) -> Set[str]:
+        """Video IDs this tool added to the playlist itself."""
+        with self._lock:
+            return {r[0] for r in self._conn.execute(
+                'SELECT youtube_id FROM playlist_items WHERE playlist_id = ? AND inserted_by_tool = 1', (playlist_id,))}
+
+    def replace_snapshot(self, playlist_id: str, video_ids: Iterable[str], track_count: Optional[int] = None,
+                         head: Optional[List[str]] = None):
+        """Stores a full copy of the playlist contents, replacing the previous one."""
+        video_ids = set(video_ids)
+        with self._lock, self._conn:
+            ours = self.tool_inserted(playlist_id)
+            self._conn.execute('DELETE FROM playlist_items WHERE playlist_id = ?', (playlist_id,))
+            self._conn.executemany(
+                'INSERT INTO playlist_items (playlist_id, youtube_id, inserted_by_tool) VALUES (?, ?, ?)',
+                ((playlist_id, v, int(v in ours)) for v in video_ids))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO playlist_snapshots (playlist_id, updated, track_count, head) VALUES (?, ?, ?, ?)',
+                (playlist_id, time.time(), len(video_ids) if track_count is None else track_count,
+                 json.dumps(head or [])))
+
+    def update_head(self, playlist_id: str, track_count: int, head: List[str]):
+        """Refreshes the staleness markers after a successful cheap check."""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE playlist_snapshots SET track_count = ?, head = ?, updated = ? '
+                               'WHERE playlist_id = ?', (track_count, json.dumps(head), time.time(), playlist_id))
+
+    def add_to_snapshot(self, playlist_id: str, video_ids: Iterable[str]):
+        """Records items inserted by this tool without reloading the playlist."""
+        video_ids = list(video_ids)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO playlist_items (playlist_id, youtube_id, inserted_by_tool) VALUES (?, ?, 1)',
+                ((playlist_id, v) for v in video_ids))
+            # Keep the expected remote count in step so the next cheap check still matches
+            self._conn.execute('UPDATE playlist_snapshots SET track_count = track_count + ?, updated = ? '
+                               'WHERE playlist_id = ?', (len(video_ids), time.time(), playlist_id))
+
+    def target_for(self, source: str, collection: str) -> Optional[str]:
+        """Returns the YouTube playlist previously created for a source collection."""
+        with self._lock:
+            row = self._conn.execute('SELECT playlist_id FROM collection_targets WHERE source = ? AND collection = ?',
+                                     (source, collection)).fetchone()
+        return row[0] if row else None
+
+    def set_target(self, source: str, collection: str, playlist_id: str):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO collection_targets (source, collection, playlist_id) '
+                               'VALUES (?, ?, ?)', (source, collection, playlist_id))
+
+    def library_playlists(self) -> Dict[str, str]:
+        """Returns the last known {title: playlist ID} of the YouTube library, in library order."""
+        with self._lock:
+            return dict(self._conn.execute('SELECT title, playlist_id FROM library_playlists ORDER BY position'))
+
+    def save_library_playlists(self, playlists: Dict[str, str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM library_playlists')
+            self._conn.executemany(
+                'INSERT INTO library_playlists (position, playlist_id, title, updated) VALUES (?, ?, ?, ?)',
+                ((i, pid, title, now) for i, (title, pid) in enumerate(playlists.items())))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,13 @@
 from dataclasses import dataclass
 
-@dataclass(frozen=True)
+# Joins several credited artists in Track.artist, e.g. "Artist A, Artist B"
+ARTIST_SEPARATOR = ', '
+
+@dataclass(frozen=True, slots=True)
 class Track:
     """Universal data structure for music tracks across different platforms."""
-    __slots__ = ['artist', 'name', 'duration_ms']
     artist: str
     name: str
-    duration_ms: int
\ No newline at end of file
+    duration_ms: int
+    # Stable ID on the source platform (e.g. Yandex track ID); empty when unknown
+    track_id: str = ''
@@ -0,0 +1,203 @@
+import email.utils
+import http.cookiejar
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from .metrics import METRICS
+
+# Statuses worth retrying. Every ytmusicapi call, including add_playlist_items, is a POST, so a POST is
+# retried only when the server did not act on it: 429 and 503 are refusals, while a 502/504 or a read
+# timeout may come after the edit was applied and a retry would add the tracks twice
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_RETRY_POST_STATUSES = {429, 503}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through once reset_timeout has passed."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self._opened_at >= self.reset_timeout else 'open'
+
+    def before_request(self, host: str):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                METRICS.inc('http.circuit_rejected')
+                raise CircuitOpenError(f"Circuit open for {host} ({self.failures} consecutive failures), "
+                                       f"retry in {max(0.0, remaining):.1f}s")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    METRICS.inc('http.circuit_opened')
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def _never_sent(exc: requests.RequestException) -> bool:
+    """True for failures while connecting, i.e. before any byte of the request reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a keep-alive pool, Retry-After aware retries and a circuit breaker per host.
+
+    A 429 or Retry-After pauses every thread talking to that host, not just the one that got it, so
+    concurrent workers settle at the rate the server allows instead of hammering it in lockstep.
+    """
+
+    def __init__(self, pool_size: int = 16, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_max: float = 60.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 timeout: float = 30.0):
+        super().__init__()
+        # Retries are handled here rather than by urllib3 so they can honor Retry-After and pace other threads
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        # Shared by both API clients: never keep response cookies, per-request ones still apply
+        self.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._not_before: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries of concurrent workers instead of synchronizing them
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _pause_host(self, host: str, seconds: float):
+        with self._lock:
+            self._not_before[host] = max(self._not_before.get(host, 0.0), time.monotonic() + seconds)
+
+    def _wait_for_host(self, host: str):
+        with self._lock:
+            wait = self._not_before.get(host, 0.0) - time.monotonic()
+        if wait > 0:
+            with METRICS.phase('http.throttle_wait'):
+                time.sleep(wait)
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).netloc
+        is_post = method.upper() == 'POST'
+        retry_statuses = _RETRY_POST_STATUSES if is_post else _RETRY_STATUSES
+        kwargs.setdefault('timeout', self.timeout)
+        breaker = self.breaker(host)
+        attempt = 0
+        while True:
+            self._wait_for_host(host)
+            breaker.before_request(host)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record_failure()
+                if attempt >= self.max_retries or (is_post and not _never_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"🌐 {host}: {type(e).__name__}, retrying in {delay:.1f}s")
+            except BaseException:
+                # Any other failure (e.g. ChunkedEncodingError) must still settle a half-open probe,
+                # otherwise the breaker would block the host for the rest of the process
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in retry_statuses:
+                    breaker.record_success()
+                    return response
+                if response.status_code == 429:
+                    METRICS.inc('http.throttled')
+                    # Throttling means the host is up but busy; it must not trip the breaker
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    # The client library turns the final status into its own exception
+                    return response
+                delay = _retry_after(response)
+                delay = self._backoff(attempt) if delay is None else min(delay, self.backoff_max)
+                if response.status_code == 429:
+                    self._pause_host(host, delay)
+                response.close()
+            attempt += 1
+            METRICS.inc('http.retries')
+            with METRICS.phase('http.backoff'):
+                time.sleep(delay)
+
+
+_shared: Optional[PooledSession] = None
+_shared_lock = threading.Lock()
+
+
+def shared_session(**options) -> PooledSession:
+    """Returns the process-wide session for single-account runs; options apply only when it is first created.
+
+    Pauses and breakers are per session, so multi-account runs (JobRunner) give each account its own.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PooledSession(**options)
+        return _shared
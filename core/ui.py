@@ -1,11 +1,19 @@
 import customtkinter as ctk
-import sys
+import queue
 
 class ConsoleRedirector:
-    """Redirects stdout to a GUI textbox with basic color-coded log levels."""
+    """Redirects stdout to a GUI textbox with basic color-coded log levels.
 
-    def __init__(self, textbox):
+    write() may be called from any thread; it only enqueues. The Tk main loop drains the
+    queue on a timer, inserting runs of same-tag text at once and trimming old lines.
+    """
+
+    def __init__(self, textbox, interval_ms: int = 100, max_lines: int = 2000):
         self.textbox = textbox
+        self.interval_ms = interval_ms
+        self.max_lines = max_lines
+        self._queue = queue.SimpleQueue()
+        self.textbox.after(self.interval_ms, self._drain)
 
     def write(self, text):
         if not text.strip() and text != '\n':
@@ -13,7 +21,6 @@ class ConsoleRedirector:
 
         # Clean control characters and progress bar artifacts
         clean_text = text.replace('\r', '').replace('█', '')
-        self.textbox.configure(state="normal")
 
         # Assign tags based on message content for highlighting
         tag = "info"
@@ -23,13 +30,36 @@ class ConsoleRedirector:
         elif "success" in lower_text or "✅" in text or "done" in lower_text:
             tag = "success"
 
-        self.textbox.insert("end", clean_text, tag)
-        self.textbox.see("end")
-        self.textbox.configure(state="disabled")
+        self._queue.put((clean_text, tag))
 
     def flush(self):
         pass
 
+    def _drain(self):
+        """Runs on the Tk thread: applies all queued writes in one textbox update."""
+        runs = []
+        try:
+            while True:
+                text, tag = self._queue.get_nowait()
+                if runs and runs[-1][1] == tag:
+                    runs[-1][0].append(text)
+                else:
+                    runs.append(([text], tag))
+        except queue.Empty:
+            pass
+
+        if runs:
+            self.textbox.configure(state="normal")
+            for parts, tag in runs:
+                self.textbox.insert("end", ''.join(parts), tag)
+            lines = int(self.textbox.index("end-1c").split('.')[0])
+            if lines > self.max_lines:
+                self.textbox.delete("1.0", f"{lines - self.max_lines + 1}.0")
+            self.textbox.see("end")
+            self.textbox.configure(state="disabled")
+        self.textbox.after(self.interval_ms, self._drain)
+
+
 class MusicTransferUI(ctk.CTk):
     def __init__(self, on_save_callback, on_start_callback):
         super().__init__()
@@ -38,6 +68,9 @@ class MusicTransferUI(ctk.CTk):
         self.create_new_option = "[ Create New Playlist ]"
         self.playlists_map = {}
         self.is_confirmed = False
+        # Latest progress reported by a worker; only the newest value is ever rendered
+        self._pending_progress = None
+        self._calls = queue.SimpleQueue()
 
         # Window configuration
         self.title("YaMusic 2 YTMusic")
@@ -52,6 +85,24 @@ class MusicTransferUI(ctk.CTk):
         self.border_color = "#1F1F1F"
 
         self._setup_ui()
+        self.after(100, self._pump)
+
+    def call_soon(self, func, *args, **kwargs):
+        """Schedules a widget update from any thread; it runs on the Tk main loop."""
+        self._calls.put((func, args, kwargs))
+
+    def _pump(self):
+        """Applies queued widget updates and the coalesced progress value, then re-arms itself."""
+        try:
+            while True:
+                func, args, kwargs = self._calls.get_nowait()
+                func(*args, **kwargs)
+        except queue.Empty:
+            pass
+        progress, self._pending_progress = self._pending_progress, None
+        if progress is not None:
+            self.progress_bar.set(progress)
+        self.after(100, self._pump)
 
     def _setup_ui(self):
         # Header
@@ -137,10 +188,16 @@ class MusicTransferUI(ctk.CTk):
         return ctk.CTkLabel(parent, text=text, font=("Inter", 10, "bold"), text_color=color,
                             fg_color="#0F0F0F", corner_radius=6, width=100, height=24)
 
-    def unlock_interface(self, playlist_titles):
+    def show_playlists(self, playlists):
+        """Fills the destination list from {title: playlist ID}, keeping the user's current choice if it still exists."""
+        current = self.playlist_combo.get() if self.playlists_map else None
+        self.playlists_map = dict(playlists)
+        titles = list(self.playlists_map) + [self.create_new_option]
+        self.playlist_combo.configure(state="normal", values=titles)
+        self.playlist_combo.set(current if current in titles else titles[0])
+
+    def unlock_interface(self):
         """Activates UI elements after successful authorization."""
-        self.playlist_combo.configure(state="normal", values=playlist_titles)
-        self.playlist_combo.set(playlist_titles[0])
         self.btn_sync.configure(state="normal", text="Start Transfer")
         self.btn_save.configure(text="Verified", state="disabled", fg_color="#064E3B")
 
@@ -162,11 +219,9 @@ class MusicTransferUI(ctk.CTk):
             self.btn_sync.configure(text="Start Transfer", fg_color=self.accent_color)
 
     def update_progress(self, current, total):
-        """Updates the visual progress bar."""
+        """Records progress from any thread; the bar is redrawn by the main loop."""
         if total > 0:
-            ratio = current / total
-            self.progress_bar.set(ratio)
-            self.update_idletasks()
+            self._pending_progress = current / total
 
     def _paste_from_clipboard(self):
         """Pastes text from system clipboard into the Yandex token entry."""
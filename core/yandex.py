@@ -1,47 +1,198 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from yandex_music import Client
-from typing import List, Optional, Callable
-from .track import Track
+from yandex_music.exceptions import NetworkError, TimedOutError
+from yandex_music.utils.request import Request
+try:
+    # Names the endpoint in schema-mismatch reports; only in newer yandex-music releases
+    from yandex_music.utils.schema_mismatch import set_current_endpoint
+except ImportError:
+    set_current_endpoint = None
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Callable, Tuple
+from .track import Track, ARTIST_SEPARATOR
+from .metrics import METRICS
+from .transport import shared_session
+
+
+class PooledRequest(Request):
+    """yandex_music transport that sends through a shared PooledSession instead of bare requests.request."""
+
+    def __init__(self, session, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    def _request_wrapper(self, *args, **kwargs) -> bytes:
+        # Same steps as Request._request_wrapper, with requests.request swapped for the pooled session
+        import requests
+
+        if set_current_endpoint is not None:
+            set_current_endpoint(*args[:2])
+        kwargs = self._prepare_kwargs(kwargs)
+        try:
+            resp = self.session.request(*args, **kwargs)
+        except requests.Timeout as e:
+            raise TimedOutError from e
+        except requests.RequestException as e:
+            raise NetworkError(e) from e
+
+        if not 200 <= resp.status_code < 300:
+            self._handle_error_response(resp.status_code, resp.content)
+        return resp.content
+
+
+@dataclass
+class SourceCollection:
+    """A Yandex track list to mirror on YouTube: liked tracks, a playlist or a liked album."""
+    key: str
+    title: str
+    track_ids: List[str]
 
 
 class YandexMusicExporter:
     """Handles data extraction from Yandex Music API."""
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, client=None, metadata_cache=None, parallel: int = 4, session=None):
+        # Optional MusicCache holding metadata by track ID; known tracks are not downloaded again
+        self.metadata_cache = metadata_cache
+        # Max concurrent client.tracks() chunk requests
+        self.parallel = max(1, parallel)
+        if client is not None:
+            self.client = client
+            return
         try:
-            self.client = Client(token).init()
+            self.client = Client(token, request=PooledRequest(session or shared_session())).init()
             print("✅ Yandex Music: Authentication successful")
         except Exception as e:
             raise PermissionError(f"Yandex Token Error: {e}")
 
-    def export_liked_tracks(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Track]:
-        """Fetches all liked tracks and converts them to the internal Track format."""
-        print("📥 Fetching liked tracks from cloud...")
-        likes = self.client.users_likes_tracks()
+    @property
+    def account_id(self) -> str:
+        """Identifies the Yandex account, e.g. 'yandex:12345'."""
+        try:
+            return f"yandex:{self.client.me.account.uid}"
+        except AttributeError:
+            return "yandex"
+
+    @property
+    def source_id(self) -> str:
+        """Identifies the account's liked-tracks collection, e.g. for the transfer journal."""
+        return f"{self.account_id}:likes"
+
+    def liked_entries(self) -> List[Tuple[str, Optional[str]]]:
+        """Returns (track ID, like timestamp) for all liked tracks, newest first, in a single call."""
+        with METRICS.timer('yandex.users_likes_tracks'):
+            likes = self.client.users_likes_tracks()
         if not likes or not likes.tracks:
             return []
+        return [(str(t.id), getattr(t, 'timestamp', None)) for t in likes.tracks]
 
-        track_ids = [t.track_id for t in likes.tracks]
-        full_tracks = []
-        batch_size = 1000
+    def liked_track_ids(self) -> List[str]:
+        """Returns IDs of all liked tracks, newest first, without downloading metadata."""
+        return [tid for tid, _ in self.liked_entries()]
 
-        # Fetch full track metadata in chunks
-        for i in range(0, len(track_ids), batch_size):
-            chunk = track_ids[i:i + batch_size]
-            full_tracks.extend(self.client.tracks(chunk))
+    def _remember(self, full_tracks):
+        """Caches metadata that arrived as a side effect of listing a collection."""
+        if self.metadata_cache:
+            self.metadata_cache.save_metadata(self._to_track(t) for t in full_tracks if t is not None)
+
+    def list_collections(self, likes: bool = True, playlists: bool = True,
+                         albums: bool = True) -> List[SourceCollection]:
+        """Lists the user's liked tracks, own playlists and liked albums with their track IDs."""
+        collections = []
+        if likes:
+            # Oldest first, matching the order liked tracks are transferred in
+            ids = list(reversed(self.liked_track_ids()))
+            if ids:
+                collections.append(SourceCollection('likes', 'Liked tracks', ids))
+
+        if playlists:
+            with METRICS.timer('yandex.users_playlists_list'):
+                summaries = self.client.users_playlists_list() or []
+            for summary in summaries:
+                with METRICS.timer('yandex.users_playlists'):
+                    playlist = self.client.users_playlists(summary.kind)
+                shorts = (playlist.tracks or []) if playlist else []
+                self._remember(getattr(s, 'track', None) for s in shorts)
+                ids = [str(s.id) for s in shorts]
+                if ids:
+                    collections.append(SourceCollection(f"playlist:{summary.kind}", summary.title, ids))
+
+        if albums:
+            with METRICS.timer('yandex.users_likes_albums'):
+                liked_albums = self.client.users_likes_albums() or []
+            for like in liked_albums:
+                if not like.album:
+                    continue
+                with METRICS.timer('yandex.albums_with_tracks'):
+                    album = self.client.albums_with_tracks(like.album.id)
+                full_tracks = [t for volume in (album.volumes or []) for t in volume] if album else []
+                self._remember(full_tracks)
+                ids = [str(t.id) for t in full_tracks]
+                if ids:
+                    collections.append(SourceCollection(f"album:{like.album.id}", like.album.title, ids))
+        return collections
+
+    def _fetch(self, track_ids: List[str]) -> Dict[str, Track]:
+        if not track_ids:
+            return {}
+        with METRICS.timer('yandex.tracks'):
+            full_tracks = self.client.tracks(track_ids)
+        fetched = [self._to_track(t) for t in full_tracks]
+        if self.metadata_cache:
+            self.metadata_cache.save_metadata(fetched)
+        return {t.track_id: t for t in fetched}
+
+    def iter_tracks(self, track_ids: List[str], batch_size: int = 1000) -> Iterator[List[Track]]:
+        """Yields converted tracks chunk by chunk, in order, as their metadata arrives.
+
+        Up to `parallel` chunk requests are in flight at once, and only IDs missing from
+        the metadata cache are requested.
+        """
+        chunks = (track_ids[i:i + batch_size] for i in range(0, len(track_ids), batch_size))
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            in_flight = deque()
+
+            def submit():
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return False
+                known = self.metadata_cache.get_metadata(chunk) if self.metadata_cache else {}
+                METRICS.inc('yandex.metadata_cache_hits', len(known))
+                unknown = [tid for tid in chunk if tid not in known]
+                in_flight.append((chunk, known, pool.submit(self._fetch, unknown)))
+                return True
+
+            while len(in_flight) < self.parallel and submit():
+                pass
+            while in_flight:
+                chunk, known, future = in_flight.popleft()
+                fetched = future.result()
+                submit()
+                # Tracks removed from Yandex come back missing and are skipped
+                yield [known.get(tid) or fetched[tid] for tid in chunk if tid in known or tid in fetched]
+
+    @staticmethod
+    def _to_track(t) -> Track:
+        names = [a.name for a in t.artists or [] if a.name]
+        artist = ARTIST_SEPARATOR.join(names) if names else "Unknown"
+        return Track(artist=artist, name=t.title, duration_ms=t.duration_ms or 0, track_id=str(t.id))
+
+    def export_liked_tracks(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Track]:
+        """Fetches all liked tracks and converts them to the internal Track format."""
+        print("📥 Fetching liked tracks from cloud...")
+        track_ids = self.liked_track_ids()
+        if not track_ids:
+            return []
 
         result = []
-        total = len(full_tracks)
+        total = len(track_ids)
         print(f"⚙️ Processing metadata for {total} tracks...")
 
-        for i, t in enumerate(full_tracks):
-            artist = t.artists[0].name if t.artists else "Unknown"
-            result.append(Track(
-                artist=artist,
-                name=t.title,
-                duration_ms=t.duration_ms or 0
-            ))
-
+        # Fetch full track metadata in chunks
+        for chunk in self.iter_tracks(track_ids):
+            result.extend(chunk)
             if progress_callback:
-                progress_callback(i + 1, total)
+                progress_callback(len(result), total)
 
-        return result
\ No newline at end of file
+        return result
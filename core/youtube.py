@@ -1,110 +1,188 @@
 import json
-import time
-from typing import Optional, Callable, List
+from typing import Optional, Callable, Dict, List, Sequence, Set
 from ytmusicapi import YTMusic
-from thefuzz import fuzz
 from .track import Track
-from .db import MusicCache
+from .db import MusicCache, CacheEntry
+from .search import SearchEngine, TokenBucket
+from .matching import Matcher, SCORER_VERSION
+from .resolver import TieredResolver, SearchTier, DEFAULT_TIERS
+from .inserter import InsertScheduler, _is_throttle
+from .metrics import METRICS
+from .transport import shared_session
 
 
 class YoutubeImporter:
     """Handles track searching and playlist population on YouTube Music."""
 
-    def __init__(self, auth_file: str = 'headers.json'):
-        self.cache = MusicCache()
+    def __init__(self, auth_file: str = 'headers.json', workers: int = 4, rate_limit: float = 5.0,
+                 match_threshold: int = 70, cache: Optional[MusicCache] = None, insert_delay: float = 0.8,
+                 ytmusic=None, tiers: Sequence[SearchTier] = DEFAULT_TIERS, session=None):
+        self.cache = cache or MusicCache()
+        self.match_threshold = match_threshold
+        self.matcher = Matcher()
+        # Lookup counters; cross_account_hits needs `account` and a `shared_origins` dict shared between importers
+        self.counters = {'cache_hits': 0, 'known_misses': 0, 'searches': 0, 'cross_account_hits': 0}
+        self.account: Optional[str] = None
+        self.shared_origins: Optional[Dict[str, str]] = None
+        # Shared across search workers so concurrency never exceeds the request budget
+        self.limiter = TokenBucket(rate_limit)
+        self.search_engine = SearchEngine(self._search_remote, workers=workers)
+        self.ytmusic = ytmusic if ytmusic is not None else self._authenticate(auth_file, session or shared_session())
+        self.resolver = TieredResolver(self._api_search, self.matcher, tiers=tiers)
+        # insert_delay is the floor of the scheduler's backoff-driven pause between inserts
+        self.inserter = InsertScheduler(self.ytmusic, cache=self.cache, base_delay=insert_delay)
+
+    @staticmethod
+    def _authenticate(auth_file: str, session) -> YTMusic:
         try:
             with open(auth_file, 'r', encoding='utf-8') as f:
                 h = json.load(f)
             # Normalize headers keys for ytmusicapi
             clean_h = {k.replace('_', '-').title(): v for k, v in h.items()}
-            self.ytmusic = YTMusic(auth=json.dumps(clean_h))
+            ytmusic = YTMusic(auth=json.dumps(clean_h), requests_session=session)
             print("✅ YouTube Music: Authentication successful")
+            return ytmusic
         except Exception as e:
             print(f"❌ Critical YT authentication error: {e}")
             raise
 
     def _search_best_match(self, track: Track) -> Optional[str]:
         """Searches for a track on YT Music and returns the most relevant videoId."""
-        cached_id = self.cache.get_youtube_id(track)
-        if cached_id:
-            return cached_id
-
-        query = f"{track.artist} - {track.name}"
+        entry = self.cache.get_entry(track)
+        if entry:
+            return self._resolve_cached(entry)
+        return self._search_remote(track)
+
+    def _resolve_cached(self, entry: CacheEntry) -> Optional[str]:
+        """Re-applies the current threshold to stored candidates instead of searching again."""
+        if not entry.candidates:
+            return entry.youtube_id
+        best = max(entry.candidates, key=lambda c: c['score'])
+        return best['videoId'] if best['score'] > self.match_threshold else None
+
+    def _api_search(self, query: str, filter: Optional[str], limit: int) -> List[dict]:
+        """One rate-limited ytmusic.search call; every resolver tier goes through here."""
+        with METRICS.phase('search.rate_limit_wait'):
+            self.limiter.acquire()
+        with METRICS.timer('ytmusic.search'):
+            results = self.ytmusic.search(query, filter=filter, limit=limit)
+        METRICS.mark('first_search')
+        return results
+
+    def _search_remote(self, track: Track) -> Optional[str]:
+        """Queries YT Music for a track through the search tiers, bypassing the cache lookup."""
         try:
-            results = self.ytmusic.search(query, filter="songs", limit=3)
-            if not results:
-                return None
-
-            best_v_id = None
-            highest_score = 0
+            # Runs on the search pool's threads, which the pipeline stage's profiler cannot see
+            with METRICS.profile('search.worker'):
+                found = self.resolver.resolve(track)
+        except Exception as e:
+            # Not cached as a miss; counted apart so errors never pass for tracks missing from the catalog
+            METRICS.inc('search.throttled' if _is_throttle(e) else 'search.errors')
+            print(f"⚠️ Search error for {track.artist} - {track.name}: {e}")
+            return None
 
-            for res in results:
-                full_res_name = f"{res['artists'][0]['name']} {res['title']}"
-                score = fuzz.token_sort_ratio(f"{track.artist} {track.name}", full_res_name)
+        # Matching threshold to avoid wrong results
+        best = found.best
+        if best and best['score'] > self.match_threshold:
+            self.cache.save_many([(track, CacheEntry(best['videoId'], best['score'], found.query, found.candidates))])
+            return best['videoId']
 
-                # Matching threshold to avoid wrong results
-                if score > highest_score and score > 70:
-                    highest_score = score
-                    best_v_id = res['videoId']
+        self.cache.save_miss(track, found.query, found.candidates)
+        return None
 
-            if best_v_id:
-                self.cache.save_mapping(track, best_v_id)
-            return best_v_id
+    def load_existing_ids(self, playlist_id: str) -> Set[str]:
+        """Returns the set of video IDs already present in the target playlist."""
+        try:
+            with METRICS.timer('ytmusic.get_playlist'):
+                playlist_data = self.ytmusic.get_playlist(playlist_id, limit=None)
         except Exception as e:
-            print(f"⚠️ Search error for {query}: {e}")
-            return None
+            # An empty set here would silently re-add every track as a duplicate
+            raise RuntimeError(f"Could not read playlist {playlist_id}: {e}") from e
+        return {item['videoId'] for item in playlist_data['tracks'] if item.get('videoId')}
+
+    def resolve_tracks(self, tracks: List[Track],
+                       progress_callback: Optional[Callable[[int, int], None]] = None,
+                       quiet: bool = False) -> List[Optional[str]]:
+        """Resolves video IDs for a batch of tracks (cache first, then concurrent search), keeping order.
+
+        quiet=True skips the summary line and the cache flush, for callers that resolve many small
+        slices and report totals from `counters` themselves.
+        """
+        self.matcher.prepare(tracks)
+        entries = self._rescore_stale(self.cache.get_entries(tracks))
+        cached = {t: self._resolve_cached(e) for t, e in entries.items()}
+        misses = [t for t in tracks if t not in cached]
+        known_misses = sum(1 for v in cached.values() if not v)
+        if not quiet:
+            print(f"💾 {len(cached) - known_misses} tracks resolved from cache, {known_misses} known misses, "
+                  f"{len(misses)} to search")
+        total, offset = len(tracks), len(tracks) - len(misses)
+        on_progress = (lambda done, _: progress_callback(offset + done, total)) if progress_callback else None
+        searched = dict(zip(misses, self.search_engine.search_all(misses, progress_callback=on_progress)))
+        if not quiet:
+            self.cache.flush()
+        self.counters['known_misses'] += known_misses
+        self._count_lookups(cached, misses)
+        return [cached.get(t) or searched.get(t) for t in tracks]
+
+    def _count_lookups(self, cached: Dict[Track, Optional[str]], searched: List[Track]):
+        self.counters['cache_hits'] += len(cached)
+        self.counters['searches'] += len(searched)
+        origins = self.shared_origins
+        if origins is None:
+            return
+        for track in cached:
+            owner = origins.get(self.cache.key(track))
+            if owner is not None and owner != self.account:
+                self.counters['cross_account_hits'] += 1
+        for track in searched:
+            origins.setdefault(self.cache.key(track), self.account)
+
+    def _rescore_stale(self, entries: Dict[Track, CacheEntry]) -> Dict[Track, CacheEntry]:
+        """Re-scores candidates cached by an older scorer in one batch, without any API calls."""
+        stale = [(t, e) for t, e in entries.items()
+                 if e.candidates and e.candidates[0].get('scorer') != SCORER_VERSION]
+        if not stale:
+            return entries
+        pairs = [(t, Matcher.candidate_from_cache(c)) for t, e in stale for c in e.candidates]
+        with METRICS.timer('matching.rescore'):
+            scores = iter(self.matcher.score_batch(pairs))
+        updated = []
+        for track, entry in stale:
+            candidates = [dict(Matcher.candidate_from_cache(c), score=next(scores), scorer=SCORER_VERSION)
+                          for c in entry.candidates]
+            best = max(candidates, key=lambda c: c['score'])
+            found = best['score'] > self.match_threshold
+            updated.append((track, CacheEntry(best['videoId'] if found else None,
+                                              best['score'] if found else None, entry.query, candidates)))
+        self.cache.save_many(updated)
+        return {**entries, **dict(updated)}
+
+    def insert_batch(self, playlist_id: str, chunk: List[str], stats: dict,
+                     on_added: Optional[Callable[[List[str]], None]] = None) -> List[str]:
+        """Adds video IDs via the adaptive scheduler, isolating rejected IDs by bisection."""
+        return self.inserter.insert(playlist_id, chunk, stats, on_added)
 
     def sync_playlist_smart(self, source_tracks: List[Track], playlist_id: str,
                             progress_callback: Optional[Callable[[int, int], None]] = None):
         """Synchronizes source tracks into a target YouTube playlist with duplicate detection."""
         stats = {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
-        total = len(source_tracks)
 
         print("🛰️ Analyzing existing YouTube playlist...")
-        try:
-            playlist_data = self.ytmusic.get_playlist(playlist_id, limit=None)
-            existing_video_ids = {item['videoId'] for item in playlist_data['tracks']}
-        except Exception:
-            existing_video_ids = set()
+        existing_video_ids = self.load_existing_ids(playlist_id)
 
         to_add_ids = []
         print(f"🔍 Searching for tracks...")
-        for i, track in enumerate(source_tracks):
-            v_id = self._search_best_match(track)
+        for v_id in self.resolve_tracks(source_tracks, progress_callback=progress_callback):
             if not v_id:
                 stats['not_found'] += 1
             elif v_id in existing_video_ids:
                 stats['skipped'] += 1
             else:
+                existing_video_ids.add(v_id)
                 to_add_ids.append(v_id)
 
-            if progress_callback:
-                progress_callback(i + 1, total)
-
         if to_add_ids:
-            batch_size = 20
             print(f"📥 Processing {len(to_add_ids)} new tracks...")
-
-            for i in range(0, len(to_add_ids), batch_size):
-                chunk = to_add_ids[i:i + batch_size]
-                try:
-                    # Attempt batch insertion
-                    res = self.ytmusic.add_playlist_items(playlist_id, chunk)
-                    if res and res.get('status') == 'STATUS_SUCCEEDED':
-                        stats['added'] += len(chunk)
-                    else:
-                        raise ValueError("Operation status not confirmed")
-                    time.sleep(0.8)
-
-                except Exception:
-                    # Fallback to single insertion if batch fails (useful for identifying "broken" track IDs)
-                    print(f"⚠️ Batch {i} failed. Switching to individual processing...")
-                    for single_id in chunk:
-                        try:
-                            self.ytmusic.add_playlist_items(playlist_id, [single_id])
-                            stats['added'] += 1
-                            time.sleep(0.5)
-                        except Exception as e:
-                            print(f"❌ Track {single_id} rejected by server: {e}")
-                            stats['failed'] += 1
-        return stats
\ No newline at end of file
+            self.insert_batch(playlist_id, to_add_ids, stats)
+        return stats
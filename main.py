@@ -3,22 +3,24 @@ import os
 import json
 import threading
 
-from core.ui import MusicTransferUI, ConsoleRedirector
-from core.yandex import YandexMusicExporter
-from core.youtube import YoutubeImporter
-
-CONFIG_FILE = 'settings.json'
-YT_HEADERS_FILE = 'headers.json'
+from core.cli import CONFIG_FILE, YT_HEADERS_FILE, RUN_REPORT_FILE
+from core.metrics import METRICS
 
 class Controller:
     """Main application controller linking logic and UI."""
 
     def __init__(self):
+        # GUI toolkit is imported here so headless entry points never pay for it
+        from core.ui import MusicTransferUI, ConsoleRedirector
         self.ui = MusicTransferUI(
             on_save_callback=self.save_settings,
             on_start_callback=self.start_transfer
         )
         self.yt = None
+        # Yandex client built during warm-up, reused by the transfer if the token did not change
+        self.yandex = None
+        self.yandex_token = None
+        self.startup = {}
 
         # Redirect standard output to UI console
         sys.stdout = ConsoleRedirector(self.ui.status_box)
@@ -27,16 +29,13 @@ class Controller:
         self.ui.btn_sync.configure(state="disabled", text="Waiting for Auth...")
 
         self.load_initial()
+        self.ui.after_idle(METRICS.mark, 'startup.window_ready')
         self.ui.mainloop()
 
     def load_initial(self):
-        """Loads existing configuration and initializes YouTube client on startup."""
-        if os.path.exists(YT_HEADERS_FILE):
-            self.ui.badge_json.configure(text="Headers.JSON: FOUND", text_color="#3B82F6")
-            threading.Thread(target=self.init_yt, daemon=True).start()
-        else:
-            print(f"⚠️ File {YT_HEADERS_FILE} not found.")
-
+        """Shows the last known playlists immediately and warms up both API clients in the background."""
+        self.show_cached_playlists()
+        token = ""
         if os.path.exists(CONFIG_FILE):
             try:
                 with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
@@ -46,6 +45,24 @@ class Controller:
             except Exception as e:
                 print(f"❌ Configuration error: {e}")
 
+        if os.path.exists(YT_HEADERS_FILE):
+            self.ui.badge_json.configure(text="Headers.JSON: FOUND", text_color="#3B82F6")
+        else:
+            print(f"⚠️ File {YT_HEADERS_FILE} not found.")
+        threading.Thread(target=self.warm_up, args=(token,), daemon=True).start()
+
+    def show_cached_playlists(self):
+        """Fills the destination list from the previous session; refreshed once YouTube is reachable."""
+        from core.state import SyncState
+        state = SyncState()
+        try:
+            playlists = state.library_playlists()
+        finally:
+            state.close()
+        if playlists:
+            self.ui.show_playlists(playlists)
+            METRICS.mark('startup.cached_playlists')
+
     def save_settings(self):
         """Saves Yandex token and triggers re-initialization."""
         token = self.ui.entry_yandex.get().strip()
@@ -57,69 +74,130 @@ class Controller:
             json.dump({"yandex_token": token}, f, indent=4)
 
         print("💾 Settings saved.")
-        threading.Thread(target=self.init_yt, daemon=True).start()
+        threading.Thread(target=self.warm_up, args=(token,), daemon=True).start()
+
+    def warm_up(self, token):
+        """Connects both services in parallel while the user picks a target, then reports startup timings."""
+        workers = []
+        if os.path.exists(YT_HEADERS_FILE):
+            workers.append(threading.Thread(target=self.init_yt, daemon=True))
+        if token:
+            workers.append(threading.Thread(target=self.init_yandex, args=(token,), daemon=True))
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        self.startup = {k: v for k, v in METRICS.snapshot()['milestones_s'].items() if k.startswith('startup.')}
+        if self.startup:
+            print("⏱️ Startup: " + " | ".join(f"{k.split('.', 1)[1].replace('_', ' ')} {v:.2f}s"
+                                             for k, v in self.startup.items()))
+
+    def init_yandex(self, token):
+        """Builds the Yandex client ahead of the transfer so it does not wait for authentication."""
+        from core.yandex import YandexMusicExporter
+        try:
+            with METRICS.phase('startup.yandex_client'):
+                self.yandex = YandexMusicExporter(token)
+            self.yandex_token = token
+            METRICS.mark('startup.yandex_ready')
+        except Exception as e:
+            self.yandex = None
+            print(f"⚠️ Yandex warm-up failed, will retry on transfer: {e}")
 
     def init_yt(self):
-        """Initializes the YouTube client and updates UI state."""
+        """Initializes the YouTube client, unlocks the UI and refreshes the playlist list."""
+        from core.youtube import YoutubeImporter
+        from core.cache_file import seed_if_empty
+        from core.state import SyncState
         try:
-            self.yt = YoutubeImporter(auth_file=YT_HEADERS_FILE)
-            self.ui.badge_google.configure(text="Google Auth: OK", text_color="#10B981")
+            with METRICS.phase('startup.youtube_client'):
+                self.yt = YoutubeImporter(auth_file=YT_HEADERS_FILE)
+            METRICS.mark('startup.youtube_ready')
+            self.ui.call_soon(self.ui.badge_google.configure, text="Google Auth: OK", text_color="#10B981")
+            # With a cached playlist list the user can start right away; the refresh below only updates it
+            if self.ui.playlists_map:
+                self.ui.call_soon(self.ui.unlock_interface)
 
             # Fetch user playlists for the dropdown
-            pls = self.yt.ytmusic.get_library_playlists(limit=50)
-            self.ui.playlists_map = {p['title']: p['playlistId'] for p in pls}
-            titles = list(self.ui.playlists_map.keys()) + [self.ui.create_new_option]
-
-            self.ui.unlock_interface(titles)
+            with METRICS.phase('startup.playlists_refresh'):
+                pls = self.yt.ytmusic.get_library_playlists(limit=50)
+            playlists = {p['title']: p['playlistId'] for p in pls}
+            state = SyncState()
+            try:
+                state.save_library_playlists(playlists)
+            finally:
+                state.close()
+            self.ui.call_soon(self.ui.show_playlists, playlists)
+            self.ui.call_soon(self.ui.unlock_interface)
+            METRICS.mark('startup.playlists_refreshed')
             print("✅ System ready for transfer.")
+            seed_if_empty(self.yt.cache)
 
         except Exception as e:
-            self.ui.badge_google.configure(text="GOOGLE: ERROR", text_color="#EF4444")
+            self.ui.call_soon(self.ui.badge_google.configure, text="GOOGLE: ERROR", text_color="#EF4444")
             print(f"❌ Authentication failed: {e}")
 
     def start_transfer(self):
         """Triggers the transfer process in a background thread."""
         self.ui.btn_sync.configure(state="disabled", text="Working...")
-        threading.Thread(target=self.run_sync, daemon=True).start()
+        # Widgets are read here, on the Tk thread, never from the worker
+        choice = self.ui.playlist_combo.get()
+        threading.Thread(target=self.run_sync, args=(choice,), daemon=True).start()
 
-    def run_sync(self):
+    def run_sync(self, choice):
         """Core migration logic execution."""
+        from core.yandex import YandexMusicExporter
+        from core.pipeline import run_liked_transfer
+        from core.journal import TransferJournal
+        from core.state import SyncState
+        METRICS.reset()
         try:
-            choice = self.ui.playlist_combo.get()
             is_new = (choice == self.ui.create_new_option)
             target_id = self.ui.playlists_map.get(choice, "LM")
 
             with open(CONFIG_FILE, 'r') as f:
                 token = json.load(f)["yandex_token"]
 
-            # Phase 1: Collect
+            # Phase 1: Connect (usually done during warm-up); metadata is streamed into the search stage
             print("\n[1/2] Exporting tracks from Yandex...")
             self.ui.update_progress(0, 100)
-            yandex = YandexMusicExporter(token)
-            tracks = yandex.export_liked_tracks(progress_callback=self.ui.update_progress)
-
-            if not tracks:
-                print("📭 No tracks found in the source.")
-                return
-
-            # Reverse to maintain original "last liked" order
-            tracks.reverse()
-
-            # Phase 2: Transfer
-            print(f"\n[2/2] Importing {len(tracks)} tracks to YouTube...")
+            if self.yandex is not None and self.yandex_token == token:
+                yandex = self.yandex
+                yandex.metadata_cache = self.yt.cache
+            else:
+                yandex = YandexMusicExporter(token, metadata_cache=self.yt.cache)
+
+            # Phase 2: Transfer (resumes automatically if a previous run was interrupted)
+            print(f"\n[2/2] Importing tracks to YouTube...")
             if is_new:
                 target_id = self.yt.ytmusic.create_playlist("Synced from Yandex", "Automated Import")
 
             self.ui.update_progress(0, 100)
-            stats = self.yt.sync_playlist_smart(tracks, target_id, progress_callback=self.ui.update_progress)
+            journal, state = TransferJournal(), SyncState()
+            try:
+                with METRICS.phase('run_sync'):
+                    stats = run_liked_transfer(yandex, self.yt, target_id, journal=journal, state=state,
+                                               progress_callback=self.ui.update_progress)
+                METRICS.write_json(RUN_REPORT_FILE, extra={'stats': stats, 'startup_s': self.startup})
+            finally:
+                journal.close()
+                state.close()
+
+            if stats is None:
+                print("📭 No tracks found in the source.")
+                return
 
             print(f"\n✨ Operation completed!")
             print(f"Added: {stats['added']} | Skipped: {stats['skipped']} | Failed: {stats['failed']}")
+            first_search = METRICS.milestones.get('first_search')
+            if first_search is not None:
+                print(f"⏱️ Time to first search: {first_search:.2f}s")
 
         except Exception as e:
             print(f"\n💥 Error: {e}")
         finally:
-            self.ui.btn_sync.configure(state="normal", text="Start Transfer")
+            self.ui.call_soon(self.ui.btn_sync.configure, state="normal", text="Start Transfer")
             self.ui.update_progress(100, 100)
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db import MusicCache  # noqa: E402
+from core.state import SyncState  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MusicCache(str(tmp_path / 'music_cache.db'))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = SyncState(str(tmp_path / 'sync_state.db'))
+    yield state
+    state.close()
@@ -0,0 +1,27 @@
+import sqlite3
+
+from core.db import MusicCache
+from core.track import Track
+
+
+def test_migrates_unversioned_v1_cache(tmp_path):
+    path = str(tmp_path / 'music_cache.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE track_mapping (yandex_key TEXT PRIMARY KEY, youtube_id TEXT, '
+                 'timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+    conn.execute("INSERT INTO track_mapping (yandex_key, youtube_id) VALUES ('artist - song', 'vid1')")
+    conn.execute("INSERT INTO track_mapping (yandex_key, youtube_id) VALUES ('main - duet', 'vid3')")
+    conn.commit()
+    conn.close()
+
+    cache = MusicCache(path)
+    assert cache.schema_version == 5
+    # Rows written by the original layout stay readable under their legacy key
+    entry = cache.get_entry(Track('Artist', 'Song', 0))
+    assert entry.youtube_id == 'vid1' and entry.score is None
+    # Keys were built from the first artist only, so multi-artist tracks must still find theirs
+    assert cache.get_entry(Track('Main, Guest', 'Duet', 0, '9')).youtube_id == 'vid3'
+    cache.save_mapping(Track('Artist', 'Other', 0, '7'), 'vid2', score=95.0, query='Artist - Other')
+    cache.flush()
+    assert cache.get_entry(Track('Artist', 'Other', 0, '7')).score == 95.0
+    cache.close()
@@ -0,0 +1,65 @@
+import pytest
+
+from core.cache_file import export_cache, import_cache
+from core.db import MusicCache
+from core.track import Track
+
+OLD = 1_600_000_000
+NEW = 1_700_000_000
+
+
+def _seed(cache):
+    cache.merge_rows([
+        ('ym:1', 'vidA', 80.0, 'q', None, OLD),
+        ('ym:2', None, None, 'q', None, OLD),
+        ('ym:3', 'vidC', 90.0, 'q', None, NEW),
+    ], on_conflict='replace')
+
+
+def _stored(cache):
+    # Straight from the table: iter_rows() leaves out misses older than the negative TTL
+    return dict(cache._conn.execute('SELECT yandex_key, youtube_id FROM track_mapping'))
+
+
+INCOMING = [
+    ('ym:1', 'vidA2', 95.0, 'q', None, NEW),  # better score, newer
+    ('ym:2', 'vidB', 70.0, 'q', None, NEW),  # hit over a miss
+    ('ym:3', 'vidC2', 99.0, 'q', None, OLD),  # better score, older
+    ('ym:4', 'vidD', 60.0, 'q', None, OLD),  # new key
+]
+
+
+@pytest.mark.parametrize('rule, expected', [
+    ('keep', {'ym:1': 'vidA', 'ym:2': None, 'ym:3': 'vidC'}),
+    ('replace', {'ym:1': 'vidA2', 'ym:2': 'vidB', 'ym:3': 'vidC2'}),
+    ('best', {'ym:1': 'vidA2', 'ym:2': 'vidB', 'ym:3': 'vidC2'}),
+    ('newer', {'ym:1': 'vidA2', 'ym:2': 'vidB', 'ym:3': 'vidC'}),
+])
+def test_merge_conflict_rules(cache, rule, expected):
+    _seed(cache)
+    result = cache.merge_rows(INCOMING, on_conflict=rule)
+    stored = _stored(cache)
+    assert stored == dict(expected, **{'ym:4': 'vidD'})
+    assert result['inserted'] == 1
+    assert result['updated'] == sum(stored[k] != v for k, v in {'ym:1': 'vidA', 'ym:2': None, 'ym:3': 'vidC'}.items())
+
+
+def test_best_never_replaces_a_hit_with_a_miss(cache):
+    _seed(cache)
+    cache.merge_rows([('ym:1', None, None, 'q', None, NEW)], on_conflict='best')
+    assert cache.get_entry(Track('Artist', 'Song', 0, '1')).youtube_id == 'vidA'
+
+
+def test_unknown_conflict_rule(cache):
+    with pytest.raises(ValueError):
+        cache.merge_rows([], on_conflict='bogus')
+
+
+def test_cache_file_round_trip(cache, tmp_path):
+    _seed(cache)
+    path = str(tmp_path / 'export.jsonl.gz')
+    assert export_cache(cache, path, include_misses=False) == 2
+    other = MusicCache(str(tmp_path / 'other.db'))
+    assert import_cache(other, path)['inserted'] == 2
+    assert {k: v for k, v, *_ in other.iter_rows()} == {'ym:1': 'vidA', 'ym:3': 'vidC'}
+    other.close()
@@ -0,0 +1,35 @@
+import io
+import json
+import sys
+
+from core import cli
+
+
+def test_json_sync_reports_failures_as_json(monkeypatch, tmp_path):
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, '__stdout__', stdout)
+    monkeypatch.setattr(sys, 'stdout', stdout)
+    monkeypatch.delenv('YANDEX_TOKEN', raising=False)
+    # The run opens its databases in the working directory
+    monkeypatch.chdir(tmp_path)
+
+    code = cli.main(['sync', '--json', '--settings', str(tmp_path / 'missing.json'), '--playlist', 'PL1',
+                     '--dry-run'])
+
+    assert code == 2
+    events = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert events[-1]['event'] == 'error'
+    assert events[-1]['type'] == 'FileNotFoundError'
+
+
+def test_missing_target_fails_before_any_client_is_built(monkeypatch, tmp_path, capsys):
+    import core.yandex
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("client built before the arguments were checked")
+
+    monkeypatch.setattr(core.yandex, 'YandexMusicExporter', no_network)
+    monkeypatch.chdir(tmp_path)
+    assert cli.main(['sync', '--token', 'x']) == 2
+    assert '--playlist or --new-playlist is required' in capsys.readouterr().out
+    assert list(tmp_path.iterdir()) == []
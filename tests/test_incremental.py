@@ -0,0 +1,75 @@
+from core.fakes import FakeYandexClient, FakeYTMusic, synthetic_library
+from core.pipeline import run_liked_transfer
+from core.track import Track
+from core.yandex import YandexMusicExporter
+from core.youtube import YoutubeImporter
+
+
+class RecordingYandexClient(FakeYandexClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched = []
+
+    def tracks(self, track_ids):
+        self.fetched.extend(track_ids)
+        return super().tracks(track_ids)
+
+
+def _setup(cache, liked, catalog):
+    client = RecordingYandexClient(liked)
+    yt = FakeYTMusic(catalog)
+    playlist_id = yt.create_playlist('Likes', '')
+    importer = YoutubeImporter(workers=2, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yt)
+    return client, YandexMusicExporter('', client=client), importer, yt, playlist_id
+
+
+def _sync(exporter, importer, playlist_id, state):
+    return run_liked_transfer(exporter, importer, playlist_id, state=state, incremental=True)
+
+
+def test_only_new_likes_are_fetched(cache, state):
+    library = synthetic_library(13)
+    client, exporter, importer, yt, playlist_id = _setup(cache, library[:10], library)
+    assert _sync(exporter, importer, playlist_id, state)['added'] == 10
+
+    new_ids = [client.like(t) for t in library[10:]]
+    client.fetched.clear()
+    stats = _sync(exporter, importer, playlist_id, state)
+    assert stats['added'] == 3
+    assert sorted(client.fetched) == sorted(new_ids)
+    assert len(yt.playlists[playlist_id]['tracks']) == 13
+
+
+def test_misses_and_failures_stay_unsynced(cache, state):
+    library = synthetic_library(10)
+    missing = Track('Nobody', 'Unreleased', 180_000)
+    client, exporter, importer, yt, playlist_id = _setup(cache, library + [missing], library)
+    refused = yt.search('Artist 0 Song 0')[0]['videoId']
+    yt.unavailable.add(refused)
+
+    stats = _sync(exporter, importer, playlist_id, state)
+    assert (stats['added'], stats['not_found'], stats['failed']) == (9, 1, 1)
+    _, synced = state.watermark(exporter.source_id, playlist_id)
+    assert len(synced) == 9
+
+    # Next run retries exactly those two; the missing one has been released since
+    yt.add_song(missing)
+    cache.negative_ttl = 0
+    client.fetched.clear()
+    stats = _sync(exporter, importer, playlist_id, state)
+    assert len(client.fetched) == 2
+    assert (stats['added'], stats['not_found'], stats['failed']) == (1, 0, 1)
+    _, synced = state.watermark(exporter.source_id, playlist_id)
+    assert len(synced) == 10
+
+
+def test_nothing_new_exits_before_any_work(cache, state):
+    library = synthetic_library(5)
+    client, exporter, importer, yt, playlist_id = _setup(cache, library, library)
+    _sync(exporter, importer, playlist_id, state)
+    client.fetched.clear()
+    searches, reads = yt.calls['search'], yt.calls['get_playlist']
+
+    assert _sync(exporter, importer, playlist_id, state) == {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+    assert client.fetched == []
+    assert (yt.calls['search'], yt.calls['get_playlist']) == (searches, reads)
@@ -0,0 +1,75 @@
+from core.fakes import FakeYTMusic, SimulatedHTTPError
+from core.inserter import InsertScheduler
+from core.transport import CircuitOpenError
+
+
+def _stats():
+    return {'added': 0, 'skipped': 0, 'not_found': 0, 'failed': 0}
+
+
+def _scheduler(ytmusic, cache, **kwargs):
+    return InsertScheduler(ytmusic, cache=cache, base_delay=0.0, max_delay=0.0, **kwargs)
+
+
+class FailingYTMusic(FakeYTMusic):
+    """Raises the given error on every add instead of answering."""
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+        self.adds = 0
+
+    def add_playlist_items(self, playlistId, videoIds, **kwargs):
+        self.adds += 1
+        raise self.error
+
+
+def test_refused_id_is_isolated_and_remembered(cache):
+    yt = FakeYTMusic()
+    ids = [f"v{i}" for i in range(20)]
+    yt.unavailable.add('v13')
+    stats = _stats()
+    added = _scheduler(yt, cache).insert('PL', ids, stats)
+
+    assert added == [v for v in ids if v != 'v13']
+    assert yt.playlists['PL']['tracks'] == added
+    assert stats['failed'] == 1
+    assert cache.get_rejected(ids) == {'v13': 'Operation status not confirmed: STATUS_FAILED'}
+
+
+def test_transport_errors_are_not_persisted_as_rejections(cache):
+    yt = FailingYTMusic(CircuitOpenError("Circuit open for music.youtube.com"))
+    ids = [f"v{i}" for i in range(20)]
+    stats = _stats()
+    assert _scheduler(yt, cache).insert('PL', ids, stats) == []
+
+    assert yt.adds == 1
+    assert stats['failed'] == 20
+    assert cache.get_rejected(ids) == {}
+
+    # The next run sends the same IDs again instead of skipping them
+    retry = _stats()
+    assert _scheduler(FakeYTMusic(), cache).insert('PL', ids, retry) == ids
+    assert retry['failed'] == 0
+
+
+def test_server_errors_stop_without_bisecting(cache):
+    yt = FailingYTMusic(SimulatedHTTPError(503))
+    stats = _stats()
+    _scheduler(yt, cache).insert('PL', [f"v{i}" for i in range(40)], stats)
+
+    assert yt.adds == 1
+    assert stats['failed'] == 40
+    assert cache.get_rejected([f"v{i}" for i in range(40)]) == {}
+
+
+def test_persistent_throttling_is_not_bisected(cache):
+    yt = FailingYTMusic(SimulatedHTTPError(429, retry_after=0.0))
+    stats = _stats()
+    scheduler = _scheduler(yt, cache, max_throttle_retries=2)
+    scheduler.insert('PL', [f"v{i}" for i in range(20)], stats)
+
+    # One chunk, its throttle retries, and no sub-sends
+    assert yt.adds == 3
+    assert stats['failed'] == 20
+    assert cache.get_rejected([f"v{i}" for i in range(20)]) == {}
@@ -0,0 +1,35 @@
+from core.fakes import FakeYandexClient, FakeYTMusic
+from core.jobs import JobRunner, TransferJob
+from core.track import Track
+from core.yandex import YandexMusicExporter
+from core.youtube import YoutubeImporter
+
+SHARED = Track('Both', 'Liked by both', 200_000)
+
+
+def test_fake_accounts_do_not_share_ids_for_different_songs(cache):
+    libraries = {
+        'a': [Track('Artist A', f'Song {i}', 200_000) for i in range(20)] + [SHARED],
+        'b': [Track('Artist B', f'Other {i}', 180_000) for i in range(20)] + [SHARED],
+    }
+    catalog = [t for tracks in libraries.values() for t in tracks]
+    clients = {name: FakeYandexClient(tracks, uid=i) for i, (name, tracks) in enumerate(libraries.items(), 1)}
+    yts = {name: FakeYTMusic(catalog) for name in libraries}
+
+    def exporter(job, cache):
+        return YandexMusicExporter('', client=clients[job.name], metadata_cache=cache)
+
+    def importer(job, cache):
+        return YoutubeImporter(workers=2, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yts[job.name])
+
+    jobs = [TransferJob(name, '', '', new_playlist='Likes') for name in libraries]
+    report = JobRunner(jobs, cache=cache, max_parallel=1, exporter_factory=exporter, importer_factory=importer).run()
+
+    assert report['failed_jobs'] == 0
+    for result in report['jobs']:
+        yt = yts[result['name']]
+        titles = {s['videoId']: s['title'] for s in yt.songs}
+        added = [titles[v] for v in yt.playlists[result['playlist_id']]['tracks']]
+        assert added == [t.name for t in libraries[result['name']]]
+    # Only the song both accounts like is served from the other account's searches
+    assert [r['counters']['cross_account_hits'] for r in report['jobs']] == [0, 1]
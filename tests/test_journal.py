@@ -0,0 +1,126 @@
+import pytest
+
+from core.fakes import FakeYandexClient, FakeYTMusic, synthetic_library
+from core.journal import INSERTED, QUEUED, TransferJournal
+from core.pipeline import run_liked_transfer
+from core.yandex import YandexMusicExporter
+from core.youtube import YoutubeImporter
+
+
+def _rows(journal, table, job_id):
+    return journal._conn.execute(f'SELECT COUNT(*) FROM {table} WHERE job_id = ?', (job_id,)).fetchone()[0]
+
+
+def test_finish_job_drops_track_rows(tmp_path):
+    journal = TransferJournal(str(tmp_path / 'journal.db'))
+    job_id = journal.start_job('src', 'PL1', ['1', '2'], {'vidA', 'vidB'})
+    journal.mark(job_id, [('1', INSERTED, 'vid1', None)])
+    journal.finish_job(job_id)
+    assert _rows(journal, 'job_tracks', job_id) == 0
+    assert _rows(journal, 'job_existing', job_id) == 0
+    assert journal.find_unfinished('src', 'PL1') is None
+    journal.close()
+
+
+def test_new_job_drops_rows_of_abandoned_one(tmp_path):
+    journal = TransferJournal(str(tmp_path / 'journal.db'))
+    old = journal.start_job('src', 'PL1', ['1', '2'], {'vidA'})
+    other = journal.start_job('src', 'PL2', ['1'], {'vidA'})
+    new = journal.start_job('src', 'PL1', ['1', '2', '3'], {'vidA'})
+    assert _rows(journal, 'job_tracks', old) == 0
+    assert _rows(journal, 'job_existing', old) == 0
+    # Other targets and the new job keep what they need to resume
+    assert _rows(journal, 'job_tracks', other) == 1
+    assert _rows(journal, 'job_tracks', new) == 3
+    assert journal.find_unfinished('src', 'PL1') == new
+    journal.close()
+
+
+
+class CrashingExporter(YandexMusicExporter):
+    """Yields the first chunk of tracks, then fails like a dropped connection."""
+
+    def __init__(self, *args, crash=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crash = crash
+
+    def iter_tracks(self, track_ids, batch_size=1000):
+        for number, chunk in enumerate(super().iter_tracks(track_ids, batch_size=10)):
+            if self.crash and number == 1:
+                raise ConnectionError("connection dropped")
+            yield chunk
+
+
+def test_interrupted_transfer_resumes_where_it_stopped(tmp_path, cache):
+    library = synthetic_library(25)
+    client = FakeYandexClient(library)
+    yt = FakeYTMusic(library)
+    playlist_id = yt.create_playlist('Likes', '')
+    journal = TransferJournal(str(tmp_path / 'journal.db'))
+    importer = YoutubeImporter(workers=2, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yt)
+
+    with pytest.raises(ConnectionError):
+        run_liked_transfer(CrashingExporter('', client=client), importer, playlist_id, journal=journal)
+    first_run = list(yt.playlists[playlist_id]['tracks'])
+    job_id = journal.find_unfinished(client_source(client), playlist_id)
+    ready, unexported = journal.pending(job_id)
+    # The second chunk never arrived; the first is journaled with its metadata
+    assert len(unexported) == 15
+    assert len(ready) + len(first_run) <= 10
+
+    fetches = client.network.calls['tracks']
+    stats = run_liked_transfer(CrashingExporter('', client=client, crash=False), importer, playlist_id,
+                               journal=journal)
+    assert client.network.calls['tracks'] - fetches == 2
+    assert stats['added'] == 25 - len(first_run)
+    tracks = yt.playlists[playlist_id]['tracks']
+    assert tracks[:len(first_run)] == first_run and len(tracks) == len(set(tracks)) == 25
+    assert journal.find_unfinished(client_source(client), playlist_id) is None
+    journal.close()
+
+
+def client_source(client):
+    return YandexMusicExporter('', client=client).source_id
+
+
+def _setup(tmp_path, cache, size):
+    library = synthetic_library(size)
+    client = FakeYandexClient(library)
+    yt = FakeYTMusic(library)
+    playlist_id = yt.create_playlist('Likes', '')
+    journal = TransferJournal(str(tmp_path / 'journal.db'))
+    importer = YoutubeImporter(workers=2, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yt)
+    return YandexMusicExporter('', client=client), importer, yt, playlist_id, journal
+
+
+def test_confirmed_inserts_are_journaled_before_the_pause(tmp_path, cache):
+    exporter, importer, yt, playlist_id, journal = _setup(tmp_path, cache, 30)
+    importer.inserter.batch_size = 5
+    seen = []
+
+    def sleep(seconds):
+        # A crash here must not leave tracks the playlist already has without an inserted state
+        inserted = journal._conn.execute('SELECT COUNT(*) FROM job_tracks WHERE state = ?', (INSERTED,)).fetchone()[0]
+        seen.append((inserted, len(yt.playlists[playlist_id]['tracks'])))
+
+    importer.inserter._sleep = sleep
+    run_liked_transfer(exporter, importer, playlist_id, journal=journal)
+    assert seen and all(inserted == in_playlist for inserted, in_playlist in seen)
+    journal.close()
+
+
+def test_resume_checks_queued_tracks_against_the_playlist(tmp_path, cache):
+    exporter, importer, yt, playlist_id, journal = _setup(tmp_path, cache, 10)
+    # State after a kill during the pause that followed a confirmed add of the first 6 tracks
+    track_ids = list(reversed(exporter.liked_track_ids()))
+    job_id = journal.start_job(exporter.source_id, playlist_id, track_ids, set())
+    tracks = [t for chunk in exporter.iter_tracks(track_ids) for t in chunk]
+    journal.mark_exported(job_id, tracks)
+    video_ids = importer.resolve_tracks(tracks)
+    journal.mark(job_id, [(t.track_id, QUEUED, v, None) for t, v in zip(tracks, video_ids)])
+    yt.playlists[playlist_id]['tracks'].extend(video_ids[:6])
+
+    stats = run_liked_transfer(exporter, importer, playlist_id, journal=journal)
+    assert stats['added'] == 4
+    assert yt.playlists[playlist_id]['tracks'] == video_ids
+    journal.close()
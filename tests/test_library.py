@@ -0,0 +1,35 @@
+from core.fakes import FakeYandexClient, FakeYTMusic, synthetic_library
+from core.library import run_library_transfer
+from core.yandex import YandexMusicExporter
+from core.youtube import YoutubeImporter
+
+
+def _setup(cache):
+    library = synthetic_library(25)
+    # 40 entries over likes, a playlist and an album; 25 unique tracks
+    client = FakeYandexClient(library[:15], playlists={'Road': library[5:20]},
+                              albums={'Album': library[10:15] + library[20:25]})
+    yt = FakeYTMusic(library)
+    importer = YoutubeImporter(workers=2, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yt)
+    return YandexMusicExporter('', client=client), importer, yt
+
+
+def test_each_unique_track_is_searched_once(cache, state):
+    exporter, importer, yt = _setup(cache)
+    result = run_library_transfer(exporter, importer, state)
+    assert (result['entries'], result['unique_tracks'], result['searches']) == (40, 25, 25)
+    assert yt.calls['search'] == 25
+    sizes = {c['title']: len(yt.playlists[c['playlist_id']]['tracks']) for c in result['collections']}
+    assert sizes == {'Liked tracks': 15, 'Road': 15, 'Album': 10}
+
+
+def test_rerun_reuses_playlists_and_adds_nothing(cache, state):
+    exporter, importer, yt = _setup(cache)
+    first = run_library_transfer(exporter, importer, state)
+    created, searches = yt.calls['create_playlist'], yt.calls['search']
+
+    second = run_library_transfer(exporter, importer, state)
+    assert [c['playlist_id'] for c in second['collections']] == [c['playlist_id'] for c in first['collections']]
+    assert yt.calls['create_playlist'] == created == 3
+    assert yt.calls['search'] == searches
+    assert second['stats']['added'] == 0 and second['stats']['skipped'] == 40
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from core.matching import Matcher
+from core.track import Track
+from core.yandex import YandexMusicExporter
+
+
+def _yandex_track(*artists):
+    return SimpleNamespace(id=5, title='Song', duration_ms=200_000,
+                           artists=[SimpleNamespace(name=a) for a in artists])
+
+
+def _result(*artists):
+    return Matcher.candidate({'videoId': 'v', 'title': 'Song', 'duration_seconds': 200,
+                              'artists': [{'name': a} for a in artists]})
+
+
+def test_all_yandex_artists_reach_the_match_key():
+    track = YandexMusicExporter._to_track(_yandex_track('Artist A', 'Artist B'))
+    assert track.artist == 'Artist A, Artist B'
+    assert Matcher().key(track) == 'artist a artist b song'
+
+
+def test_multi_artist_source_scores():
+    matcher = Matcher()
+    track = YandexMusicExporter._to_track(_yandex_track('Artist A', 'Artist B'))
+    full, main_only, other = matcher.score_batch([(track, _result('Artist A', 'Artist B')),
+                                                  (track, _result('Artist A')),
+                                                  (track, _result('Artist C'))])
+    assert full == 100 and main_only == 100
+    assert other < 90
+
+
+def test_single_artist_unchanged():
+    track = Track('Artist A', 'Song', 200_000, '1')
+    assert YandexMusicExporter._to_track(_yandex_track('Artist A')) == Track('Artist A', 'Song', 200_000, '5')
+    assert Matcher().score_batch([(track, _result('Artist A', 'Artist B'))]) == [100.0]
@@ -0,0 +1,41 @@
+import os
+import pstats
+import threading
+
+from core.metrics import Metrics
+
+
+def _worker_only_function():
+    return sum(range(1000))
+
+
+def test_profile_covers_other_threads(tmp_path):
+    metrics = Metrics()
+    metrics.enable_profiling(str(tmp_path))
+
+    def work():
+        with metrics.profile('search.worker'):
+            _worker_only_function()
+
+    with metrics.profile('pipeline.search'):
+        threads = [threading.Thread(target=work) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    metrics.dump_profiles()
+
+    stats = pstats.Stats(os.path.join(tmp_path, 'search.worker.prof'))
+    calls = {func[2]: counts[0] for func, counts in stats.stats.items()}
+    assert calls['_worker_only_function'] == 3
+    assert os.path.exists(os.path.join(tmp_path, 'pipeline.search.prof'))
+
+
+def test_nested_profile_counts_toward_outer(tmp_path):
+    metrics = Metrics()
+    metrics.enable_profiling(str(tmp_path))
+    with metrics.profile('outer'):
+        with metrics.profile('inner'):
+            _worker_only_function()
+    metrics.dump_profiles()
+    assert os.listdir(tmp_path) == ['outer.prof']
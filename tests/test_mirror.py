@@ -0,0 +1,67 @@
+import pytest
+
+from core.fakes import FakeYTMusic
+from core.mirror import PlaylistMirror
+
+
+def _playlist(size=150):
+    yt = FakeYTMusic()
+    playlist_id = yt.create_playlist('Target', '')
+    yt.playlists[playlist_id]['tracks'] = [f'vid{i}' for i in range(size)]
+    return yt, playlist_id
+
+
+def _mirrored(yt, playlist_id, state):
+    mirror = PlaylistMirror(yt, state)
+    mirror.existing_ids(playlist_id)
+    return mirror, yt.calls['get_playlist']
+
+
+def test_current_mirror_is_served_with_one_call(state):
+    yt, playlist_id = _playlist()
+    mirror, calls = _mirrored(yt, playlist_id, state)
+    assert mirror.existing_ids(playlist_id) == {f'vid{i}' for i in range(150)}
+    assert yt.calls['get_playlist'] - calls == 1
+
+
+def test_count_change_reloads(state):
+    yt, playlist_id = _playlist()
+    mirror, calls = _mirrored(yt, playlist_id, state)
+    # Added past the first page: only the count tells
+    yt.playlists[playlist_id]['tracks'].append('new')
+    assert 'new' in mirror.existing_ids(playlist_id)
+    assert yt.calls['get_playlist'] - calls == 2
+
+
+def test_first_page_change_reloads(state):
+    yt, playlist_id = _playlist()
+    mirror, calls = _mirrored(yt, playlist_id, state)
+    # Same count, but an item on the first page was swapped
+    yt.playlists[playlist_id]['tracks'][5] = 'swapped'
+    ids = mirror.existing_ids(playlist_id)
+    assert 'swapped' in ids and 'vid5' not in ids
+    assert yt.calls['get_playlist'] - calls == 2
+
+
+def test_add_to_snapshot_keeps_the_check_passing(state):
+    yt, playlist_id = _playlist()
+    mirror, _ = _mirrored(yt, playlist_id, state)
+    yt.add_playlist_items(playlist_id, ['ours1', 'ours2'])
+    state.add_to_snapshot(playlist_id, ['ours1', 'ours2'])
+    calls = yt.calls['get_playlist']
+    assert {'ours1', 'ours2'} <= mirror.existing_ids(playlist_id)
+    assert yt.calls['get_playlist'] - calls == 1
+    assert state.tool_inserted(playlist_id) == {'ours1', 'ours2'}
+
+
+class BrokenYTMusic(FakeYTMusic):
+    def get_playlist(self, playlistId, limit=100, **kwargs):
+        super().get_playlist(playlistId, limit=limit)
+        raise ConnectionError("connection reset")
+
+
+def test_failed_read_raises_instead_of_returning_empty(state):
+    yt = BrokenYTMusic()
+    with pytest.raises(RuntimeError, match='Could not read playlist'):
+        PlaylistMirror(yt, state, retries=2).existing_ids('PL1')
+    assert yt.calls['get_playlist'] == 3
@@ -0,0 +1,25 @@
+from core.fakes import FakeYTMusic, synthetic_library
+from core.pipeline import TransferPipeline
+from core.youtube import YoutubeImporter
+
+
+def _chunks(tracks, size=100):
+    return (tracks[i:i + size] for i in range(0, len(tracks), size))
+
+
+def test_lookup_summary_is_printed_once_per_run(cache, capsys):
+    library = synthetic_library(400)
+    yt = FakeYTMusic(library)
+    playlist_id = yt.create_playlist('Target', '')
+    importer = YoutubeImporter(workers=4, rate_limit=0, cache=cache, insert_delay=0.0, ytmusic=yt)
+
+    stats = TransferPipeline(importer, slice_size=50).run(_chunks(library), playlist_id, existing=set())
+    assert stats['added'] == 400
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('💾')]
+    assert lines == ['💾 0 tracks resolved from cache, 0 known misses, 400 searched']
+    # Flushed at the end of the search stage even though slices skip the flush
+    assert cache._conn.execute('SELECT COUNT(*) FROM track_mapping').fetchone()[0] == 400
+
+    TransferPipeline(importer, slice_size=50).run(_chunks(library), playlist_id, existing=set(yt.playlists[playlist_id]['tracks']))
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('💾')]
+    assert lines == ['💾 400 tracks resolved from cache, 0 known misses, 0 searched']
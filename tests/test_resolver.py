@@ -0,0 +1,90 @@
+import pytest
+
+from core.fakes import FakeYTMusic
+from core.matching import Matcher
+from core.resolver import DEFAULT_TIERS, SearchTier, TieredResolver, parse_tiers
+from core.track import Track
+
+SONG = Track('Artist', 'Song', 200_000, '1')
+
+
+def _resolver(catalog, tiers=DEFAULT_TIERS):
+    yt = FakeYTMusic(catalog)
+    resolver = TieredResolver(lambda q, f, limit: yt.search(q, filter=f, limit=limit), Matcher(), tiers=tiers)
+    return resolver, yt
+
+
+def test_confident_duration_matched_hit_exits_after_first_tier():
+    resolver, yt = _resolver([SONG])
+    found = resolver.resolve(SONG)
+    assert found.early_exit and found.tier == 'songs:3:plain'
+    assert found.best['title'] == 'Song' and found.query == 'Artist - Song'
+    assert yt.calls['search'] == 1
+    assert resolver.report()['songs:3:plain'] == {'calls': 1, 'exits': 1}
+
+
+def test_duration_mismatch_is_not_confident():
+    # Same artist and title, 8s longer: scores above the bar but fails the 5s tolerance
+    resolver, yt = _resolver([Track('Artist', 'Song', 208_000)])
+    found = resolver.resolve(SONG)
+    assert not found.early_exit and found.tier is None
+    assert found.best['score'] >= resolver.confident_score
+    # songs:10 and the translit tier repeat a query that already came back short; videos is a new filter
+    assert resolver.report() == {
+        'songs:3:plain': {'calls': 1, 'exits': 0},
+        'songs:10:plain': {'calls': 0, 'exits': 0},
+        'songs:5:translit': {'calls': 0, 'exits': 0},
+        'videos:5:plain': {'calls': 1, 'exits': 0},
+    }
+    assert yt.calls['search'] == 2
+
+
+def test_narrower_limit_on_same_query_is_skipped():
+    resolver, yt = _resolver([Track('Artist', 'Song', 208_000)], [SearchTier('songs', 5), SearchTier('songs', 3)])
+    resolver.resolve(SONG)
+    assert yt.calls['search'] == 1
+    assert resolver.calls == {'songs:5:plain': 1}
+
+
+def test_wider_limit_runs_when_the_last_call_came_back_full():
+    catalog = [Track('Artist', f'Song {i}', 100_000) for i in range(12)]
+    resolver, yt = _resolver(catalog, [SearchTier('songs', 3), SearchTier('songs', 10)])
+    resolver.resolve(SONG)
+    assert resolver.calls == {'songs:3:plain': 1, 'songs:10:plain': 1}
+    assert yt.calls['search'] == 2
+
+
+def test_candidates_are_merged_across_tiers():
+    catalog = [Track('Artist', f'Song {i}', 100_000) for i in range(12)]
+    resolver, _ = _resolver(catalog, [SearchTier('songs', 3), SearchTier('songs', 10), SearchTier('videos', 5)])
+    found = resolver.resolve(SONG)
+    ids = [c['videoId'] for c in found.candidates]
+    # Results seen by several tiers appear once, best score first, capped at keep_candidates
+    assert len(ids) == len(set(ids)) == resolver.keep_candidates
+    scores = [c['score'] for c in found.candidates]
+    assert scores == sorted(scores, reverse=True)
+    assert found.best is found.candidates[0] and 'query' not in found.best
+
+
+def test_translit_tier_finds_cyrillic_source():
+    resolver, yt = _resolver([Track('Kino', 'Gruppa krovi', 280_000)])
+    found = resolver.resolve(Track('Кино', 'Группа крови', 280_000, '2'))
+    assert found.early_exit and found.tier == 'songs:5:translit'
+    assert found.query == 'kino gruppa krovi'
+    assert yt.calls['search'] == 2
+
+
+def test_no_results_keep_the_first_query():
+    resolver, _ = _resolver([])
+    found = resolver.resolve(SONG)
+    assert found.best is None and found.candidates == [] and found.query == 'Artist - Song'
+
+
+def test_parse_tiers():
+    assert parse_tiers('all:5, videos:3:translit') == [SearchTier(None, 5), SearchTier('videos', 3, 'translit')]
+
+
+@pytest.mark.parametrize('spec', ['', 'songs', 'songs:x', 'songs:3:bogus', 'songs:3:plain:extra'])
+def test_parse_tiers_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_tiers(spec)
@@ -0,0 +1,27 @@
+import random
+import time
+
+from core.fakes import synthetic_library
+from core.search import SearchEngine
+
+
+def test_search_all_keeps_input_order():
+    rng = random.Random(1)
+    delays = {}
+
+    def search(track):
+        # Later tracks often finish first
+        time.sleep(delays.setdefault(track, rng.uniform(0, 0.01)))
+        return track.name
+
+    tracks = synthetic_library(60)
+    progress = []
+    results = SearchEngine(search, workers=8).search_all(tracks, progress_callback=lambda d, t: progress.append(d))
+    assert results == [t.name for t in tracks]
+    assert progress == list(range(1, 61))
+
+
+def test_search_all_single_worker_and_empty_input():
+    tracks = synthetic_library(5)
+    assert SearchEngine(lambda t: t.name, workers=1).search_all(tracks) == [t.name for t in tracks]
+    assert SearchEngine(lambda t: t.name).search_all([]) == []
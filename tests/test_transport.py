@@ -0,0 +1,93 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.transport import PooledSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == '/slow':
+            time.sleep(0.3)
+        status = {'/bad-gateway': 502, '/busy': 503, '/throttle': 429}.get(self.path, 200)
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _answer
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = {}
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+
+def _session(**kwargs):
+    return PooledSession(max_retries=2, backoff_base=0.0, **kwargs)
+
+
+def test_get_retries_gateway_errors(server):
+    assert _session().get(server + '/bad-gateway').status_code == 502
+    assert _Handler.hits['/bad-gateway'] == 3
+
+
+def test_post_is_not_retried_when_the_server_may_have_applied_it(server):
+    session = _session()
+    assert session.post(server + '/bad-gateway').status_code == 502
+    with pytest.raises(requests.ReadTimeout):
+        session.post(server + '/slow', timeout=0.1)
+    assert _Handler.hits == {'/bad-gateway': 1, '/slow': 1}
+
+
+def test_post_is_retried_when_refused(server):
+    session = _session()
+    assert session.post(server + '/throttle').status_code == 429
+    assert session.post(server + '/busy').status_code == 503
+    assert _Handler.hits == {'/throttle': 3, '/busy': 3}
+
+
+def test_probe_failing_with_any_exception_reopens_the_breaker(server, monkeypatch):
+    session = _session(failure_threshold=1, reset_timeout=0.05)
+    host = server.split('//', 1)[1]
+    breaker = session.breaker(host)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    def broken(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    monkeypatch.setattr(requests.Session, 'request', broken)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        session.get(server + '/ok')
+    assert breaker.state == 'open'
+
+    monkeypatch.undo()
+    time.sleep(0.06)
+    assert session.get(server + '/ok').status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_each_job_gets_its_own_session(cache):
+    from core.jobs import JobRunner, TransferJob
+
+    jobs = [TransferJob(name=name, yandex_token='', headers='', playlist_id='PL') for name in ('a', 'b')]
+    runner = JobRunner(jobs, cache=cache)
+    first, second = runner._session(jobs[0]), runner._session(jobs[1])
+
+    assert first is not second
+    assert runner._session(jobs[0]) is first
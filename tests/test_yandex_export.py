@@ -0,0 +1,70 @@
+import random
+import threading
+import time
+
+from core.fakes import FakeYandexClient, synthetic_library
+from core.track import Track
+from core.yandex import YandexMusicExporter
+
+
+class SlowYandexClient(FakeYandexClient):
+    """Answers tracks() after a random delay and records what was asked and how many calls overlapped."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested = []
+        self.in_flight = self.peak = 0
+        self._rng = random.Random(3)
+        self._lock = threading.Lock()
+
+    def tracks(self, track_ids):
+        with self._lock:
+            self.requested.extend(track_ids)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            delay = self._rng.uniform(0, 0.02)
+        time.sleep(delay)
+        try:
+            return super().tracks(track_ids)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _ids(exporter):
+    return list(reversed(exporter.liked_track_ids()))
+
+
+def test_parallel_fetches_yield_chunks_in_order():
+    library = synthetic_library(95)
+    client = SlowYandexClient(library)
+    exporter = YandexMusicExporter('', client=client, parallel=3)
+    ids = _ids(exporter)
+    chunks = list(exporter.iter_tracks(ids, batch_size=10))
+    assert [len(c) for c in chunks] == [10] * 9 + [5]
+    assert [t.track_id for c in chunks for t in c] == ids
+    assert [t.name for c in chunks for t in c] == [t.name for t in library]
+    assert client.peak <= 3
+
+
+def test_cached_metadata_is_not_requested_again(cache):
+    library = synthetic_library(30)
+    client = SlowYandexClient(library[:20])
+    exporter = YandexMusicExporter('', client=client, metadata_cache=cache)
+    list(exporter.iter_tracks(_ids(exporter), batch_size=8))
+    assert len(client.requested) == 20
+
+    new_ids = [client.like(t) for t in library[20:]]
+    client.requested.clear()
+    tracks = [t for c in exporter.iter_tracks(_ids(exporter), batch_size=8) for t in c]
+    assert sorted(client.requested) == sorted(new_ids)
+    assert [t.name for t in tracks] == [t.name for t in library]
+
+
+def test_legacy_key_row_is_copied_to_the_id_key(cache):
+    cache.merge_rows([('artist - song', 'vid1', 90.0, 'Artist - Song', None, None)])
+    track = Track('Artist', 'Song', 200_000, '42')
+    assert cache.get_entries([track])[track].youtube_id == 'vid1'
+    cache.flush()
+    keys = dict(cache._conn.execute('SELECT yandex_key, youtube_id FROM track_mapping'))
+    assert keys == {'artist - song': 'vid1', 'ym:42': 'vid1'}
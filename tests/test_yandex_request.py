@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import pytest
+from yandex_music import Client
+from yandex_music.exceptions import NotFoundError
+
+from core import yandex
+from core.yandex import PooledRequest
+
+
+class _Session:
+    def __init__(self, status, content=b'{"result": {}}'):
+        self.response = SimpleNamespace(status_code=status, content=content)
+        self.calls = []
+
+    def request(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.response
+
+
+def test_requests_go_through_the_session_and_keep_the_endpoint(monkeypatch):
+    endpoints = []
+    if yandex.set_current_endpoint is not None:
+        monkeypatch.setattr(yandex, 'set_current_endpoint', lambda *a: endpoints.append(a))
+    session = _Session(200)
+    client = Client('token', request=PooledRequest(session))
+
+    assert client.request._request_wrapper('GET', 'https://api.example/x', timeout=5) == b'{"result": {}}'
+    assert session.calls[0][0] == ('GET', 'https://api.example/x')
+    if yandex.set_current_endpoint is not None:
+        assert endpoints == [('GET', 'https://api.example/x')]
+
+
+def test_error_statuses_map_to_library_exceptions():
+    client = Client('token', request=PooledRequest(_Session(404, b'{"error": "not found"}')))
+    with pytest.raises(NotFoundError):
+        client.request._request_wrapper('GET', 'https://api.example/x', timeout=5)
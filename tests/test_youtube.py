@@ -0,0 +1,31 @@
+from core.fakes import FakeYTMusic, SimulatedHTTPError, SimulatedNetwork
+from core.metrics import METRICS
+from core.track import Track
+from core.transport import PooledSession
+from core.youtube import YoutubeImporter
+
+TRACK = Track('Artist', 'Song', 200_000, '1')
+
+
+class DownYTMusic(FakeYTMusic):
+    def search(self, query, filter=None, limit=20):
+        raise SimulatedHTTPError(503)
+
+
+def test_simulated_throttling_goes_through_session_retries():
+    network = SimulatedNetwork(max_rps=1)
+    yt = FakeYTMusic([TRACK], network=network, session=PooledSession())
+    assert yt.search('Artist Song')[0]['title'] == 'Song'
+    # Over the rate cap: answered with 429, retried after Retry-After instead of failing
+    assert yt.search('Artist Song')[0]['title'] == 'Song'
+    assert network.throttled == 1
+    assert network.calls['search'] == 3
+
+
+def test_failed_search_is_counted_and_not_cached_as_miss(cache):
+    METRICS.reset()
+    importer = YoutubeImporter(workers=1, rate_limit=0, cache=cache, ytmusic=DownYTMusic())
+    assert importer.resolve_tracks([TRACK]) == [None]
+    assert METRICS.counters['search.errors'] == 1
+    assert 'search.throttled' not in METRICS.counters
+    assert cache.get_entry(TRACK) is None